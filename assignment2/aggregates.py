@@ -0,0 +1,131 @@
+from collections import deque
+
+# Numeric fields of a daily entry
+METRICS = ("sleep", "water", "mood")
+
+# Rolling windows, in number of most recent logged days
+WINDOWS = (7, 30, 90)
+
+
+def entry_values(entry):
+    """The numeric metrics of one daily entry as floats (missing/invalid -> 0)"""
+    values = []
+    for metric in METRICS:
+        try:
+            values.append(float(entry.get(metric, 0)))
+        except (TypeError, ValueError):
+            values.append(0.0)
+    return values
+
+
+class HealthAggregates:
+    """Running statistics over one user's daily entries
+
+    Keeps rolling sums over the last 7/30/90 logged days plus lifetime
+    count, totals, min and max for sleep, water and mood. Logging a new
+    latest day is O(1); editing or back-filling a day refills the rolling
+    windows from the newest 90 entries, which is bounded by the largest
+    window. `health_data` and `date_index` are the user's live structures.
+    """
+
+    def __init__(self, health_data, date_index, windows=WINDOWS):
+        self.health_data = health_data
+        self.date_index = date_index
+        self.windows = tuple(sorted(windows))
+        self.rebuild()
+
+    def rebuild(self):
+        """Recompute everything from the raw entries"""
+        self.count = 0
+        self.totals = [0.0] * len(METRICS)
+        self.mins = [None] * len(METRICS)
+        self.maxs = [None] * len(METRICS)
+        self._extremes_stale = False
+        for date in self.date_index:
+            values = entry_values(self.health_data[date])
+            self.count += 1
+            self._add_totals(values, 1)
+            self._widen_extremes(values)
+        self._refill_recent()
+
+    def _add_totals(self, values, sign):
+        for i, value in enumerate(values):
+            self.totals[i] += sign * value
+
+    def _widen_extremes(self, values):
+        for i, value in enumerate(values):
+            if self.mins[i] is None or value < self.mins[i]:
+                self.mins[i] = value
+            if self.maxs[i] is None or value > self.maxs[i]:
+                self.maxs[i] = value
+
+    def _push(self, date, values):
+        for n in self.windows:
+            sums = self.window_sums[n]
+            if len(self.recent) >= n:
+                _, dropped = self.recent[-n]
+                for i, value in enumerate(dropped):
+                    sums[i] -= value
+            for i, value in enumerate(values):
+                sums[i] += value
+        self.recent.append((date, values))
+
+    def _refill_recent(self):
+        self.recent = deque(maxlen=self.windows[-1])
+        self.window_sums = {n: [0.0] * len(METRICS) for n in self.windows}
+        for date in reversed(self.date_index.latest(self.windows[-1])):
+            self._push(date, entry_values(self.health_data[date]))
+
+    def add(self, date, entry, previous=None):
+        """Fold in an entry just saved for `date`; `previous` is the entry it replaced"""
+        values = entry_values(entry)
+        if previous is None:
+            self.count += 1
+        else:
+            old_values = entry_values(previous)
+            self._add_totals(old_values, -1)
+            # Replacing a min/max value means the extremes must be rescanned
+            if any(old in (self.mins[i], self.maxs[i]) for i, old in enumerate(old_values)):
+                self._extremes_stale = True
+        self._add_totals(values, 1)
+        if not self._extremes_stale:
+            self._widen_extremes(values)
+
+        newest = self.recent[-1][0] if self.recent else None
+        if previous is None and (newest is None or date > newest):
+            self._push(date, values)
+        else:
+            self._refill_recent()
+
+    def window(self, n):
+        """Averages over the last n logged days: {"days", "sleep", "water", "mood"}"""
+        sums = self.window_sums[n]
+        days = min(n, len(self.recent))
+        stats = {"days": days}
+        for i, metric in enumerate(METRICS):
+            stats[metric] = sums[i] / days if days else 0
+        return stats
+
+    def lifetime(self):
+        if self._extremes_stale:
+            self.mins = [None] * len(METRICS)
+            self.maxs = [None] * len(METRICS)
+            for date in self.date_index:
+                self._widen_extremes(entry_values(self.health_data[date]))
+            self._extremes_stale = False
+
+        stats = {"days": self.count}
+        for i, metric in enumerate(METRICS):
+            stats[metric] = {
+                "total": self.totals[i],
+                "average": self.totals[i] / self.count if self.count else 0,
+                "min": self.mins[i],
+                "max": self.maxs[i],
+            }
+        return stats
+
+    def summary(self):
+        return {
+            "windows": {n: self.window(n) for n in self.windows},
+            "lifetime": self.lifetime(),
+        }
@@ -0,0 +1,337 @@
+from bisect import bisect_left
+from datetime import date as Date
+from aggregates import METRICS, entry_values
+
+try:
+    import numpy as np
+except ImportError:
+    # Analytics are optional; the rest of the app runs without numpy
+    np = None
+
+NUMPY_AVAILABLE = np is not None
+
+# Smallest column buffer; buffers double when full
+MIN_CAPACITY = 64
+
+
+def require_numpy():
+    if np is None:
+        raise RuntimeError("Health analytics need numpy (pip install numpy)")
+
+
+def date_ordinal(date):
+    return Date.fromisoformat(date).toordinal()
+
+
+class HealthColumns:
+    """A user's health history as contiguous arrays, oldest day first
+
+    `ordinals` holds proleptic day numbers and `values` one float64 row per
+    metric (see aggregates.METRICS), in buffers with spare capacity so that
+    logging a new latest day is an amortised O(1) append. Editing a day
+    updates it in place; back-filling an older day rebuilds the columns.
+    `version` changes whenever the columns do, for caches built on top;
+    `generation` only on rebuilds, with in-place edits listed in `edits`
+    so incremental consumers know which rows to recompute.
+    """
+
+    def __init__(self, health_data, date_index):
+        require_numpy()
+        self.health_data = health_data
+        self.date_index = date_index
+        self.version = 0
+        self.generation = 0
+        self.rebuild()
+
+    def rebuild(self):
+        """Recreate the columns from the raw entries"""
+        self.dates = list(self.date_index)
+        self.size = len(self.dates)
+        capacity = max(MIN_CAPACITY, 2 * self.size)
+        self._ordinals = np.empty(capacity, dtype=np.int64)
+        self._values = np.empty((len(METRICS), capacity), dtype=np.float64)
+        if self.size:
+            self._ordinals[:self.size] = [date_ordinal(date) for date in self.dates]
+            self._values[:, :self.size] = np.array(
+                [entry_values(self.health_data[date]) for date in self.dates]).T
+        self.edits = []
+        self.generation += 1
+        self.version += 1
+
+    def add(self, date, entry, previous=None):
+        """Fold in an entry just saved for `date`; `previous` is the entry it replaced"""
+        if previous is None and (not self.dates or date > self.dates[-1]):
+            self._ordinals = grow(self._ordinals, self.size + 1)
+            self._values = grow(self._values, self.size + 1)
+            self._ordinals[self.size] = date_ordinal(date)
+            self._values[:, self.size] = entry_values(entry)
+            self.dates.append(date)
+            self.size += 1
+        elif previous is not None:
+            i = bisect_left(self.dates, date)
+            self._values[:, i] = entry_values(entry)
+            self.edits.append(i)
+        else:
+            self.rebuild()
+            return
+        self.version += 1
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def ordinals(self):
+        return self._ordinals[:self.size]
+
+    def column(self, metric):
+        return self._values[METRICS.index(metric), :self.size]
+
+    @property
+    def sleep(self):
+        return self.column("sleep")
+
+    @property
+    def water(self):
+        return self.column("water")
+
+    @property
+    def mood(self):
+        return self.column("mood")
+
+
+def grow(array, size):
+    """Return `array`, or a copy with room for `size` items along its last axis"""
+    capacity = array.shape[-1]
+    if size <= capacity:
+        return array
+    grown = np.empty(array.shape[:-1] + (max(size, 2 * capacity),), dtype=array.dtype)
+    grown[..., :capacity] = array
+    return grown
+
+
+def moving_average(values, window, start=0):
+    """Trailing mean over the last `window` entries (fewer at the start)
+
+    Only positions from `start` on are computed and returned.
+    """
+    require_numpy()
+    values = np.asarray(values, dtype=np.float64)
+    lo = max(0, start - window + 1)
+    segment = values[lo:]
+    if not len(segment):
+        return segment.copy()
+    sums = np.cumsum(segment)
+    sums[window:] = sums[window:] - sums[:-window]
+    counts = np.minimum(np.arange(lo + 1, len(values) + 1), window)
+    return (sums / counts)[start - lo:]
+
+
+def batch_health_scores(sleep, water, mood):
+    """health_stats.calculate_health_score() applied element-wise to arrays"""
+    require_numpy()
+    sleep_score = np.select([(sleep >= 7) & (sleep <= 9),
+                             (sleep >= 6) & (sleep <= 10),
+                             (sleep >= 5) & (sleep <= 11)],
+                            [40.0, 30.0, 20.0], 10.0)
+    water_score = np.minimum(water / 10 * 30, 30)
+    mood_score = (mood / 5) * 30
+    return np.clip(sleep_score + water_score + mood_score, 0, 100)
+
+
+def trend(ordinals, values):
+    """Least-squares slope of values per day, or 0.0 with fewer than two distinct days"""
+    require_numpy()
+    if len(values) < 2:
+        return 0.0
+    x = ordinals - ordinals.mean()
+    denominator = np.dot(x, x)
+    if denominator == 0:
+        return 0.0
+    return float(np.dot(x, values - values.mean()) / denominator)
+
+
+def weekday_profile(ordinals, values):
+    """Mean value per weekday, Monday first (None for weekdays never logged)"""
+    require_numpy()
+    # date.toordinal() is 1 for Monday 0001-01-01
+    weekdays = (ordinals - 1) % 7
+    counts = np.bincount(weekdays, minlength=7)
+    sums = np.bincount(weekdays, weights=values, minlength=7)
+    return [float(sums[i] / counts[i]) if counts[i] else None for i in range(7)]
+
+
+def correlation(a, b):
+    """Pearson correlation, or None when either series is constant or too short"""
+    require_numpy()
+    if len(a) < 2:
+        return None
+    a = a - a.mean()
+    b = b - b.mean()
+    denominator = np.sqrt(np.dot(a, a) * np.dot(b, b))
+    if denominator == 0:
+        return None
+    return float(np.dot(a, b) / denominator)
+
+
+class HealthScoreSeries:
+    """Health score of every logged day and of every trailing window
+
+    `daily` scores each day's own entry; `rolling` scores the average of
+    the `window` entries ending at each day, as the Reports screen does for
+    the latest week. refresh() only scores rows appended or edited since
+    the last call, unless the columns were rebuilt.
+    """
+
+    def __init__(self, columns, window=7):
+        require_numpy()
+        self.columns = columns
+        self.window = window
+        self._generation = None
+        self.refresh()
+
+    def refresh(self):
+        columns = self.columns
+        if self._generation != columns.generation:
+            self._generation = columns.generation
+            self._edits_seen = 0
+            self._size = 0
+            self._daily = np.empty(MIN_CAPACITY)
+            self._rolling = np.empty(MIN_CAPACITY)
+
+        # Rows from `start` on need scoring; an edit also changes the
+        # windows of the rows after it
+        start = self._size
+        new_edits = columns.edits[self._edits_seen:]
+        if new_edits:
+            start = min(start, min(new_edits))
+        self._edits_seen = len(columns.edits)
+        size = len(columns)
+        if start >= size:
+            return self
+
+        self._daily = grow(self._daily, size)
+        self._rolling = grow(self._rolling, size)
+        sleep, water, mood = columns.sleep, columns.water, columns.mood
+        self._daily[start:size] = batch_health_scores(sleep[start:], water[start:], mood[start:])
+        self._rolling[start:size] = batch_health_scores(
+            moving_average(sleep, self.window, start),
+            moving_average(water, self.window, start),
+            moving_average(mood, self.window, start))
+        self._size = size
+        return self
+
+    @property
+    def daily(self):
+        return self._daily[:self._size]
+
+    @property
+    def rolling(self):
+        return self._rolling[:self._size]
+
+    def _week(self, i):
+        dates = self.columns.dates
+        return {"start": dates[max(0, i - self.window + 1)], "end": dates[i],
+                "score": float(self.rolling[i])}
+
+    def best_week(self):
+        """The highest-scoring full window (or partial one with less history)"""
+        if not self._size:
+            return None
+        first = min(self.window, self._size) - 1
+        return self._week(first + int(np.argmax(self.rolling[first:])))
+
+    def worst_week(self):
+        if not self._size:
+            return None
+        first = min(self.window, self._size) - 1
+        return self._week(first + int(np.argmin(self.rolling[first:])))
+
+    def streaks(self, threshold=70):
+        """Longest and current runs of consecutive calendar days scoring >= threshold"""
+        if not self._size:
+            return {"longest": 0, "longest_end": None, "current": 0}
+        good = self.daily >= threshold
+        follows = np.zeros(self._size, dtype=bool)
+        follows[1:] = (np.diff(self.columns.ordinals) == 1) & good[:-1]
+        run_ids = np.cumsum(good & ~follows)
+        lengths = np.bincount(run_ids[good], minlength=run_ids[-1] + 1)
+        if not lengths.any():
+            return {"longest": 0, "longest_end": None, "current": 0}
+        longest_id = int(np.argmax(lengths))
+        longest_end = int(np.flatnonzero(good & (run_ids == longest_id))[-1])
+        return {
+            "longest": int(lengths[longest_id]),
+            "longest_end": self.columns.dates[longest_end],
+            "current": int(lengths[run_ids[-1]]) if good[-1] else 0,
+        }
+
+    def trend(self):
+        """Change in daily score per week"""
+        return 7 * trend(self.columns.ordinals, self.daily)
+
+
+class HealthAnalytics:
+    """Vectorised analyses over one user's HealthColumns
+
+    Results are recomputed only when the columns' version changes.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+        self._cache = {}
+        self._scores = {}
+
+    def _cached(self, key, compute):
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == self.columns.version:
+            return cached[1]
+        result = compute()
+        self._cache[key] = (self.columns.version, result)
+        return result
+
+    def moving_averages(self, window=7):
+        return self._cached(("moving", window), lambda: {
+            metric: moving_average(self.columns.column(metric), window) for metric in METRICS})
+
+    def trends(self):
+        """Change per week of each metric over the whole history"""
+        return self._cached("trends", lambda: {
+            metric: 7 * trend(self.columns.ordinals, self.columns.column(metric)) for metric in METRICS})
+
+    def weekday_profiles(self):
+        return self._cached("weekday", lambda: {
+            metric: weekday_profile(self.columns.ordinals, self.columns.column(metric)) for metric in METRICS})
+
+    def correlations(self):
+        return self._cached("correlations", lambda: {
+            "sleep_mood": correlation(self.columns.sleep, self.columns.mood),
+            "water_mood": correlation(self.columns.water, self.columns.mood),
+        })
+
+    def scores(self, window=7):
+        """The user's HealthScoreSeries, brought up to date"""
+        series = self._scores.get(window)
+        if series is None:
+            series = self._scores[window] = HealthScoreSeries(self.columns, window)
+        return series.refresh()
+
+    def score_highlights(self, window=7):
+        series = self.scores(window)
+        return {
+            "best_week": series.best_week(),
+            "worst_week": series.worst_week(),
+            "streaks": series.streaks(),
+            "trend": series.trend(),
+        }
+
+    def summary(self):
+        columns = self.columns
+        return {
+            "days": len(columns),
+            "first": columns.dates[0] if columns.dates else None,
+            "last": columns.dates[-1] if columns.dates else None,
+            "trends": self.trends(),
+            "weekday": self.weekday_profiles(),
+            "correlations": self.correlations(),
+            "scores": self.score_highlights(),
+        }
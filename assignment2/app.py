@@ -1,18 +1,26 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, scrolledtext
 import datetime
+import importlib
 import os, json
+import time
 
-# Import UI modules
-from ui_main_menu import *  
-from ui_health_log import *
-from ui_bmi_calorie import *
-from ui_history import *
-from ui_profile import *
-from ui_login import *
 from utils_data import *
 from auth import * 
+from persistence import PersistenceWorker
+from tasks import TaskExecutor
+from health_stats import HealthStats
 
+# UI screens by name: (module, entry function). A screen's module is only
+# imported the first time it is shown, so startup loads just the login screen.
+SCREENS = {
+    "login": ("ui_login", "create_login_screen"),
+    "main_menu": ("ui_main_menu", "create_main_menu"),
+    "health_log": ("ui_health_log", "daily_health_log"),
+    "bmi_calorie": ("ui_bmi_calorie", "bmi_calorie_calculator"),
+    "history": ("ui_history", "view_health_history"),
+    "profile_tab": ("ui_profile", "create_profile_tab"),
+}
 
 class HealthWellnessApp:
     def __init__(self, root):
@@ -22,9 +30,29 @@ class HealthWellnessApp:
         
         self.setup_styles()
         
-        self.auth = auth_system
+        # User data is loaded by start_loading() so the window appears at once
+        self.auth = AuthenticationSystem(load=False)
         
-        self.show_login_screen()
+        # Background work for loading, logins and reports; results come back
+        # to the Tk thread through the executor's queue. Data changes are
+        # applied on the Tk thread, in order, and written by the persistence
+        # worker, so exit never drops a save.
+        self.tasks = TaskExecutor(self.root).start()
+        
+        # Write data changes on a background thread so Tk never waits on disk
+        self.persistence = PersistenceWorker(self.auth, self.root, on_complete=self.on_data_saved,
+                                             executor=self.tasks).start()
+        self.root.protocol("WM_DELETE_WINDOW", self.exit_app)
+        
+        # Averages and scores shared by the History and Reports screens
+        self.stats = HealthStats(self.auth)
+        
+        # Screen functions loaded so far, and how long each module took to import
+        self._screens = {}
+        self.screen_load_times = {}
+        
+        self.show_splash_screen()
+        self.start_loading()
         
     def setup_styles(self):
         style = ttk.Style()
@@ -55,6 +83,61 @@ class HealthWellnessApp:
                         padding=(20, 12),
                         font=('Arial', 11))
         
+    # Return a screen's entry function, importing its module on first use
+    def screen(self, name):
+        func = self._screens.get(name)
+        if func is None:
+            module_name, func_name = SCREENS[name]
+            start = time.perf_counter()
+            module = importlib.import_module(module_name)
+            self.screen_load_times.setdefault(module_name, time.perf_counter() - start)
+            func = self._screens[name] = getattr(module, func_name)
+        return func
+    
+    # Lightweight screen shown while user data loads
+    def show_splash_screen(self):
+        self.clear_frame()
+        
+        splash_frame = tk.Frame(self.root, bg=self.colors['dark_bg'])
+        splash_frame.pack(fill='both', expand=True)
+        
+        tk.Label(splash_frame, text="🏥",
+                 font=("Arial", 80),
+                 bg=self.colors['dark_bg'], fg='white').pack(pady=(150, 10))
+        
+        tk.Label(splash_frame, text="Health & Wellness Assistant",
+                 font=("Arial", 28, "bold"),
+                 bg=self.colors['dark_bg'], fg='white').pack(pady=(0, 30))
+        
+        progress = ttk.Progressbar(splash_frame, mode='indeterminate', length=300)
+        progress.pack(pady=10)
+        progress.start(10)
+        
+        tk.Label(splash_frame, text="Loading user data...",
+                 font=("Arial", 12),
+                 bg=self.colors['dark_bg'], fg=self.colors['text_muted']).pack()
+    
+    # Load user data on a background thread, then show the login form - or
+    # the main menu when a remembered user's session is still valid
+    def start_loading(self):
+        def load():
+            self.auth.load()
+            # Also loads the remembered user's data while the splash is up
+            return self.auth.restore_session()
+        
+        self.tasks.submit(load, on_done=self.on_data_loaded)
+    
+    # Called on the Tk thread once loading has finished
+    def on_data_loaded(self, restored_user, error):
+        if error is not None:
+            messagebox.showerror("❌ Error", f"Failed to load user data:\n{error}")
+            self.exit_app()
+            return
+        if restored_user is not None:
+            self.show_main_menu()
+        else:
+            self.show_login_screen()
+    
     # Clear current interface
     def clear_frame(self):
         for widget in self.root.winfo_children():
@@ -63,7 +146,7 @@ class HealthWellnessApp:
     # Show login screen
     def show_login_screen(self):
         self.clear_frame()
-        create_login_screen(self)
+        self.screen("login")(self)
 
     # Show main menu
     def show_main_menu(self):
@@ -72,7 +155,7 @@ class HealthWellnessApp:
             return
         
         self.clear_frame()
-        create_main_menu(self)
+        self.screen("main_menu")(self)
 
     # Show health log
     def show_health_log(self):
@@ -80,7 +163,7 @@ class HealthWellnessApp:
             self.show_login_screen()
             return
         
-        daily_health_log(self)
+        self.screen("health_log")(self)
 
     # Show BMI calculator
     def show_bmi_calorie(self):
@@ -88,7 +171,7 @@ class HealthWellnessApp:
             self.show_login_screen()
             return
         
-        bmi_calorie_calculator(self)
+        self.screen("bmi_calorie")(self)
 
     # Show history records
     def show_history(self):
@@ -96,7 +179,7 @@ class HealthWellnessApp:
             self.show_login_screen()
             return
         
-        view_health_history(self)
+        self.screen("history")(self)
 
     # Show user profile
     def show_profile_tab(self, parent):
@@ -104,7 +187,7 @@ class HealthWellnessApp:
             self.show_login_screen()
             return
         
-        create_profile_tab(self, parent)
+        self.screen("profile_tab")(self, parent)
 
     # Custom logout confirmation dialog
     def custom_logout_confirmation(self):
@@ -215,8 +298,19 @@ class HealthWellnessApp:
     def save_all_data(self):
         return True
     
+    # Called on the Tk thread after each background write
+    def on_data_saved(self, written, error):
+        if error is not None:
+            messagebox.showerror("❌ Save Failed",
+                                 f"Your latest changes could not be saved:\n{error}")
+    
     # Exit application
     def exit_app(self):
+        # Let running tasks finish (queued ones are dropped), then write
+        # anything still pending before closing
+        self.tasks.shutdown()
+        self.persistence.stop()
+        self.auth.close()
         self.root.quit()
 
     
@@ -1,35 +1,307 @@
-import json
+import copy
 import os
-import hashlib
+import threading
 from datetime import datetime
+from storage import create_store, SECTIONS, BMI_HISTORY_LIMIT, account_record
+from user_cache import UserCache, estimate_size, DEFAULT_MAX_ENTRIES, DEFAULT_MAX_BYTES
+from date_index import DateIndex
+from aggregates import HealthAggregates
+import passwords
+from sessions import SessionStore, PRIVATE_FILE_MODE
 
 class AuthenticationSystem:
-    def __init__(self):
+    def __init__(self, data_dir="users", users_file="users.json", backend=None,
+                 cache_entries=DEFAULT_MAX_ENTRIES, cache_bytes=DEFAULT_MAX_BYTES, load=True):
         self.current_user = None
-        self.users_file = "users.json"
-        self.load_users()
+        self.data_dir = data_dir
+        self.users_file = users_file
+        self.cache_entries = cache_entries
+        self.cache_bytes = cache_bytes
+        
+        # Storage backend: "json", "single", "sqlite" or "memory" (see storage.create_store)
+        self.backend = backend or os.environ.get("HEALTH_APP_STORAGE", "json")
+        
+        # Changes not yet written: account index entries, whole sections
+        # to rewrite, health/BMI records to append, and login metadata
+        self._dirty_accounts = set()
+        self._dirty_sections = {}
+        self._pending_appends = {}
+        self._dirty_activity = set()
+        
+        # Login metadata (last_login, login_count, last_session) by user.
+        # It changes on every sign-in, so it is stored apart from the user
+        # record (StorageBackend.save_activity) and never rewrites it.
+        self._activity = {}
+        
+        # Users whose changes are being written right now; they stay cached
+        # until the write finishes (see _can_evict)
+        self._flushing = set()
+        # Copies of sections from a failed write, used by the retry if the
+        # user is no longer cached by then
+        self._unsaved_sections = {}
+        self.save_stats = {"flushes": 0, "bytes_written": 0,
+                           "last_flush_bytes": 0, "last_flush_users": 0}
+        
+        # Bumped whenever a user's profile or health data changes, so
+        # derived results (see health_stats.HealthStats) know to refresh
+        self._data_versions = {}
+        
+        # _lock guards in-memory state; _flush_lock keeps flushes in order.
+        # With a PersistenceWorker attached, mutations are written in the
+        # background instead of flushed synchronously.
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self.persistence = None
+        
+        # The store is opened by load(); pass load=False to call it later,
+        # e.g. from a background thread while the GUI shows a splash screen
+        self.store = None
+        self.sessions = None
+        self.accounts = {}
+        self._reset_cache()
+        self.loaded = threading.Event()
+        if load:
+            self.load()
+    
+    # Open the storage backend (migrating legacy data if needed) and read
+    # the account index
+    def load(self):
+        store = create_store(self.backend, self.data_dir, self.users_file)
+        with self._lock:
+            self.store = store
+            self._move_legacy_sessions()
+            self.sessions = SessionStore(os.path.join(self.data_dir, "sessions.json"),
+                                         os.path.join(self.data_dir, "remember.json"))
+            self.load_users()
+        self.loaded.set()
+        return self
+    
+    # Session files used to sit next to the data directory, world-readable
+    def _move_legacy_sessions(self):
+        for name in ("sessions.json", "remember.json"):
+            legacy_path = f"{self.data_dir}.{name}"
+            path = os.path.join(self.data_dir, name)
+            if os.path.exists(legacy_path) and not os.path.exists(path):
+                os.makedirs(self.data_dir, exist_ok=True)
+                os.chmod(legacy_path, PRIVATE_FILE_MODE)
+                os.replace(legacy_path, path)
     
-    # Load user data
+    def is_loaded(self):
+        return self.loaded.is_set()
+    
+    # Write pending changes and close the store (waiting for any background
+    # compaction it started)
+    def close(self):
+        if self.store is None:
+            return
+        self.flush()
+        self.store.close()
+    
+    # Load the account index only; user data is hydrated on demand into
+    # an LRU cache bounded by cache_entries / cache_bytes
     def load_users(self):
-        if os.path.exists(self.users_file):
-            with open(self.users_file, 'r') as f:
-                self.users = json.load(f)
-        else:
-            self.users = {}
-            self.save_users()
+        self.accounts = self.store.load_accounts()
+        self._reset_cache()
     
-    # Save data
+    def _reset_cache(self):
+        self.users = UserCache(self.cache_entries, self.cache_bytes)
+        self._date_indexes = {}
+        self._aggregates = {}
+        self._analytics = {}
+    
+    # Return a user's full record, loading it from storage if needed
+    def _get_user(self, username):
+        with self._lock:
+            user = self.users.get(username)
+            if user is None and username in self.accounts:
+                user = self.store.load_user(username, self.accounts[username])
+                self.users.put(username, user)
+                self._enforce_budget(keep=username)
+            return user
+    
+    def is_hydrated(self, username):
+        return username in self.users
+    
+    # Users that can leave memory: not signed in and nothing left to write
+    def _can_evict(self, username):
+        return (username != self.current_user and
+                username not in self._dirty_sections and
+                username not in self._pending_appends and
+                username not in self._flushing)
+    
+    def _enforce_budget(self, keep=None):
+        with self._lock:
+            evicted = self.users.evict(lambda username: username != keep and self._can_evict(username))
+            for username in evicted:
+                self._drop_derived(username)
+    
+    # Forget structures built from a user's data (date index, aggregates, analytics)
+    def _drop_derived(self, username):
+        self._date_indexes.pop(username, None)
+        self._aggregates.pop(username, None)
+        self._analytics.pop(username, None)
+    
+    # Drop a user's data from memory now
+    def evict_user(self, username):
+        with self._lock:
+            if username not in self.users or not self._can_evict(username):
+                return False
+            del self.users[username]
+            self._drop_derived(username)
+            return True
+    
+    # Hit, miss and eviction counters of the user cache
+    def get_cache_stats(self):
+        with self._lock:
+            return self.users.stats()
+    
+    # Save data (every loaded user - prefer save_user for single-user changes)
     def save_users(self):
-        with open(self.users_file, 'w') as f:
-            json.dump(self.users, f, indent=4)
+        with self._lock:
+            for username in self.users:
+                self._dirty_accounts.add(username)
+                self.mark_dirty(username, *SECTIONS)
+        return self.flush()
     
-    # Password encryption
-    def hash_password(self, password):
-        return hashlib.sha256(password.encode()).hexdigest()
+    # Save one user's data, optionally only some sections
+    def save_user(self, username, sections=SECTIONS):
+        self.mark_dirty(username, *sections)
+        return self.flush()
+    
+    # Record that sections of a user must be rewritten on the next flush
+    def mark_dirty(self, username, *sections):
+        with self._lock:
+            self._dirty_sections.setdefault(username, set()).update(sections)
+    
+    # Queue a health/BMI record to be appended on the next flush
+    def _queue_append(self, username, section, record):
+        self._pending_appends.setdefault(username, []).append((section, record))
     
-    # Register user
-    def register(self, username, password, email="", age="", height="", weight=""):
+    # Copy of a section to write: the cached record, or the copy kept from
+    # a failed write if the user has left the cache since
+    def _section_copy(self, username, section):
         if username in self.users:
+            return copy.deepcopy(self.users[username][section])
+        return self._unsaved_sections[username][section]
+    
+    def _bump_version(self, username):
+        self._data_versions[username] = self._data_versions.get(username, 0) + 1
+    
+    def get_data_version(self, username=None):
+        if username is None:
+            username = self.current_user
+        return self._data_versions.get(username, 0)
+    
+    def has_pending_changes(self):
+        return bool(self._dirty_accounts or self._dirty_sections or self._pending_appends or
+                    self._dirty_activity)
+    
+    # Attach a PersistenceWorker (or None to go back to synchronous saves)
+    def set_persistence(self, worker):
+        self.persistence = worker
+    
+    # Persist a mutation now, or hand it to the background worker
+    def _commit(self):
+        if self.persistence is not None:
+            self.persistence.request_flush()
+        else:
+            self.flush()
+    
+    # Write only what changed since the last flush
+    def flush(self):
+        with self._flush_lock:
+            # Snapshot the changes under the lock, then write without holding it
+            with self._lock:
+                if not self.has_pending_changes():
+                    return 0
+                
+                accounts = {username: self.accounts[username]
+                            for username in self._dirty_accounts}
+                writes = []
+                for username in set(self._dirty_sections) | set(self._pending_appends):
+                    sections = self._dirty_sections.get(username, set())
+                    data = {section: self._section_copy(username, section) for section in sections}
+                    # A rewritten section already contains its queued records
+                    appends = [(section, copy.deepcopy(record))
+                               for section, record in self._pending_appends.get(username, [])
+                               if section not in sections]
+                    writes.append((username, tuple(s for s in SECTIONS if s in sections), data, appends))
+                activity = {username: dict(self._activity[username])
+                            for username in self._dirty_activity}
+                
+                self._dirty_accounts = set()
+                self._dirty_sections = {}
+                self._pending_appends = {}
+                self._dirty_activity = set()
+                self._flushing = {username for username, _, _, _ in writes}
+            
+            try:
+                written = self._write_changes(accounts, writes, activity)
+            except Exception:
+                # Rewrite everything touched on the next attempt (appends
+                # become section rewrites so nothing is applied twice),
+                # keeping copies of the data in case the user is evicted
+                with self._lock:
+                    self._dirty_accounts.update(accounts)
+                    self._dirty_activity.update(activity)
+                    for username, sections, data, appends in writes:
+                        unsaved = self._unsaved_sections.setdefault(username, {})
+                        unsaved.update(data)
+                        for section, _ in appends:
+                            if section not in data and username in self.users:
+                                unsaved[section] = copy.deepcopy(self.users[username][section])
+                        self.mark_dirty(username, *sections, *(section for section, _ in appends))
+                    self._flushing = set()
+                raise
+            
+            with self._lock:
+                for username in self._flushing:
+                    self._unsaved_sections.pop(username, None)
+                self._flushing = set()
+            
+            self.save_stats["flushes"] += 1
+            self.save_stats["bytes_written"] += written
+            self.save_stats["last_flush_bytes"] = written
+            self.save_stats["last_flush_users"] = len(writes)
+            
+            # Users that were pinned by unsaved changes may now be evicted
+            self._enforce_budget()
+            return written
+    
+    def _write_changes(self, accounts, writes, activity):
+        written = 0
+        if accounts:
+            written += self.store.save_accounts(accounts)
+        
+        for username, record in activity.items():
+            written += self.store.save_activity(username, record)
+        
+        for username, sections, data, appends in writes:
+            if sections:
+                written += self.store.save_user(username, data, sections)
+            for section, record in appends:
+                if section == "health_data":
+                    written += self.store.append_health_entry(username, *record)
+                else:
+                    written += self.store.append_bmi_record(username, record)
+        return written
+    
+    # Bytes written per flush, to confirm saves stay small
+    def get_save_stats(self):
+        stats = dict(self.save_stats)
+        stats["avg_flush_bytes"] = (stats["bytes_written"] / stats["flushes"]
+                                    if stats["flushes"] else 0)
+        return stats
+    
+    # Salted scrypt hash (see passwords.py for the cost settings). Slow by
+    # design: the GUI calls register/login from a worker thread.
+    def hash_password(self, password):
+        return passwords.hash_password(password)
+    
+    # Register user; sign_in=True also signs the new user in, without
+    # checking the just-hashed password a second time
+    def register(self, username, password, email="", age="", height="", weight="", sign_in=False):
+        if username in self.accounts:
             return False, "Username already exists!"
         
         if len(password) < 6:
@@ -45,36 +317,88 @@ class AuthenticationSystem:
                 "height": height,
                 "weight": weight,
                 "gender": "male",
-                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "last_login": ""
+                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             },
             "health_data": {},
             "bmi_history": []
         }
         
-        self.users[username] = user_profile
-        self.save_users()
+        with self._lock:
+            self.accounts[username] = account_record(user_profile)
+            self.users[username] = user_profile
+            self._dirty_accounts.add(username)
+            self.mark_dirty(username, *SECTIONS)
+        self._commit()
+        if sign_in:
+            self._start_session(username, "password")
         return True, "Registration successful!"
     
-    def login(self, username, password):
-        """User login"""
-        if username not in self.users:
+    def login(self, username, password, remember=False):
+        """User login; remember=True keeps the user signed in on this machine"""
+        if username not in self.accounts:
             return False, "Username not found!"
         
-        user = self.users[username]
-        if user["password_hash"] != self.hash_password(password):
+        stored_hash = self.accounts[username]["password_hash"]
+        if not passwords.verify_password(password, stored_hash):
             return False, "Incorrect password!"
         
-        # Update last login time
-        user["profile"]["last_login"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        self.save_users()
+        # Upgrade legacy SHA-256 (or outdated scrypt) hashes while we have the password
+        new_hash = self.hash_password(password) if passwords.needs_rehash(stored_hash) else None
         
-        self.current_user = username
+        if new_hash is not None:
+            with self._lock:
+                self.accounts[username]["password_hash"] = new_hash
+                self._get_user(username)["password_hash"] = new_hash
+                self._dirty_accounts.add(username)
+        
+        self._start_session(username, "password")
+        if remember:
+            self.sessions.create(username)
         return True, f"Welcome back, {username}!"
     
+    # Sign in the user remembered on this machine, skipping the password
+    # check; returns the username or None
+    def restore_session(self):
+        username = self.sessions.restore()
+        if username is None or username not in self.accounts:
+            return None
+        self._start_session(username, "remembered")
+        return username
+    
+    def _start_session(self, username, method):
+        # Hydrate the user's data now that they are signed in
+        self._get_user(username)
+        
+        # Only the small login metadata record is written, however much
+        # history the user has
+        with self._lock:
+            activity = self.get_activity(username)
+            activity["last_login"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            activity["login_count"] = activity.get("login_count", 0) + 1
+            activity["last_session"] = method
+            self._dirty_activity.add(username)
+        self._commit()
+        
+        self.current_user = username
+    
+    def get_activity(self, username=None):
+        """Get a user's login metadata: last_login, login_count, last_session"""
+        if username is None:
+            username = self.current_user
+        
+        with self._lock:
+            activity = self._activity.get(username)
+            if activity is None:
+                activity = self._activity[username] = self.store.load_activity(username)
+            return activity
+    
     def logout(self):
         """User logout"""
+        # Logging out also ends a remembered session
+        self.sessions.forget()
         self.current_user = None
+        # The user's data stays cached until the memory budget needs it
+        self._enforce_budget()
     
     def is_logged_in(self):
         """Check if user is logged in"""
@@ -89,8 +413,9 @@ class AuthenticationSystem:
         if username is None:
             username = self.current_user
         
-        if username in self.users:
-            return self.users[username]["profile"]
+        user = self._get_user(username)
+        if user is not None:
+            return user["profile"]
         return {}
     
     def get_user_health_data(self, username=None):
@@ -98,8 +423,9 @@ class AuthenticationSystem:
         if username is None:
             username = self.current_user
         
-        if username in self.users:
-            return self.users[username]["health_data"]
+        user = self._get_user(username)
+        if user is not None:
+            return user["health_data"]
         return {}
     
     def get_user_bmi_history(self, username=None):
@@ -107,58 +433,200 @@ class AuthenticationSystem:
         if username is None:
             username = self.current_user
         
-        if username in self.users:
-            return self.users[username]["bmi_history"]
+        user = self._get_user(username)
+        if user is not None:
+            return user["bmi_history"]
         return []
     
+    def get_date_index(self, username=None):
+        """Get the sorted index of a user's logged dates"""
+        if username is None:
+            username = self.current_user
+        
+        with self._lock:
+            index = self._date_indexes.get(username)
+            if index is None:
+                user = self._get_user(username)
+                index = DateIndex(user["health_data"] if user is not None else ())
+                if user is not None:
+                    self._date_indexes[username] = index
+            return index
+    
+    def get_sorted_dates(self, username=None, reverse=True):
+        """Get a user's logged dates, newest first by default"""
+        index = self.get_date_index(username)
+        return index.newest_first() if reverse else list(index)
+    
+    def get_latest_dates(self, n, username=None):
+        """Get the n most recent logged dates, newest first"""
+        return self.get_date_index(username).latest(n)
+    
+    def get_dates_before(self, date, n=None, username=None):
+        """Get logged dates before a date, newest first"""
+        return self.get_date_index(username).before(date, n)
+    
+    def get_dates_after(self, date, n=None, username=None):
+        """Get logged dates after a date, oldest first"""
+        return self.get_date_index(username).after(date, n)
+    
+    def get_dates_between(self, start, end, username=None):
+        """Get logged dates between two dates (inclusive), oldest first"""
+        return self.get_date_index(username).between(start, end)
+    
+    def get_health_aggregates(self, username=None):
+        """Get a user's rolling and lifetime sleep/water/mood statistics"""
+        if username is None:
+            username = self.current_user
+        
+        with self._lock:
+            aggregates = self._aggregates.get(username)
+            if aggregates is None:
+                user = self._get_user(username)
+                if user is None:
+                    return None
+                if "health_data" not in user:
+                    user["health_data"] = {}
+                aggregates = HealthAggregates(user["health_data"], self.get_date_index(username))
+                self._aggregates[username] = aggregates
+            return aggregates
+    
+    def get_health_analytics(self, username=None):
+        """Get vectorised analytics over a user's full history (needs numpy)"""
+        if username is None:
+            username = self.current_user
+        
+        with self._lock:
+            analytics = self._analytics.get(username)
+            if analytics is None:
+                # Imported here so numpy is only loaded once analytics are asked for
+                from analytics import HealthColumns, HealthAnalytics
+                user = self._get_user(username)
+                if user is None:
+                    return None
+                if "health_data" not in user:
+                    user["health_data"] = {}
+                columns = HealthColumns(user["health_data"], self.get_date_index(username))
+                analytics = HealthAnalytics(columns)
+                self._analytics[username] = analytics
+            return analytics
+    
+    def get_health_entries(self, start=None, end=None, username=None):
+        """Get {date: entry} for start <= date <= end, oldest first"""
+        if username is None:
+            username = self.current_user
+        
+        with self._lock:
+            if username in self.users:
+                health_data = self.users[username]["health_data"]
+                return {date: health_data[date]
+                        for date in self.get_date_index(username).between(start, end)}
+        # Not loaded: let the store read just the range
+        return self.store.query_health_range(username, start, end)
+    
+    def get_health_page(self, page_size, cursor=None, username=None):
+        """Get one page of entries, newest first
+        
+        Returns ({date: entry}, next_cursor); pass next_cursor back in to get
+        the following (older) page. next_cursor is None after the last page.
+        """
+        if username is None:
+            username = self.current_user
+        
+        with self._lock:
+            if username in self.users:
+                index = self.get_date_index(username)
+                dates = index.latest(page_size) if cursor is None else index.before(cursor, page_size)
+                health_data = self.users[username]["health_data"]
+                page = [(date, health_data[date]) for date in dates]
+            else:
+                page = self.store.query_health_page(username, page_size, before=cursor)
+        
+        next_cursor = page[-1][0] if page and len(page) == page_size else None
+        return dict(page), next_cursor
+    
+    def get_latest(self, n, username=None):
+        """Get the n most recent entries as {date: entry}, newest first"""
+        if n <= 0:
+            return {}
+        return self.get_health_page(n, username=username)[0]
+    
+    def iter_health_entries(self, page_size=50, username=None):
+        """Iterate (date, entry) pairs newest first, reading one page at a time"""
+        cursor = None
+        while True:
+            page, cursor = self.get_health_page(page_size, cursor, username)
+            yield from page.items()
+            if cursor is None:
+                return
+    
     def update_user_profile(self, profile_data, username=None):
         """Update user profile"""
         if username is None:
             username = self.current_user
         
-        if username in self.users:
-            self.users[username]["profile"].update(profile_data)
-            self.save_users()
-            return True
-        return False
+        with self._lock:
+            user = self._get_user(username)
+            if user is None:
+                return False
+            user["profile"].update(profile_data)
+            self.mark_dirty(username, "profile")
+            self._bump_version(username)
+        self._commit()
+        return True
     
     def add_health_data(self, date, data, username=None):
         """Add health data"""
         if username is None:
             username = self.current_user
         
-        if username in self.users:
-            if "health_data" not in self.users[username]:
-                self.users[username]["health_data"] = {}
+        with self._lock:
+            user = self._get_user(username)
+            if user is None:
+                return False
+            if "health_data" not in user:
+                user["health_data"] = {}
             
-            self.users[username]["health_data"][date] = data
-            self.save_users()
-            return True
-        return False
+            previous = user["health_data"].get(date)
+            user["health_data"][date] = data
+            if username in self._date_indexes:
+                self._date_indexes[username].add(date)
+            if username in self._aggregates:
+                self._aggregates[username].add(date, data, previous)
+            if username in self._analytics:
+                self._analytics[username].columns.add(date, data, previous)
+            self._bump_version(username)
+            # An edit replaces the previous entry rather than adding to it
+            size = estimate_size(data)
+            if previous is not None:
+                size -= estimate_size(previous)
+            self.users.add_size(username, size)
+            self._queue_append(username, "health_data", (date, data))
+        self._commit()
+        return True
     
     def add_bmi_record(self, bmi_data, username=None):
         """Add BMI record"""
         if username is None:
             username = self.current_user
         
-        if username in self.users:
-            if "bmi_history" not in self.users[username]:
-                self.users[username]["bmi_history"] = []
+        with self._lock:
+            user = self._get_user(username)
+            if user is None:
+                return False
+            if "bmi_history" not in user:
+                user["bmi_history"] = []
             
             bmi_data["timestamp"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            self.users[username]["bmi_history"].append(bmi_data)
+            user["bmi_history"].append(bmi_data)
             
             # Keep only last 10 records
-            if len(self.users[username]["bmi_history"]) > 10:
-                self.users[username]["bmi_history"] = self.users[username]["bmi_history"][-10:]
+            if len(user["bmi_history"]) > BMI_HISTORY_LIMIT:
+                user["bmi_history"] = user["bmi_history"][-BMI_HISTORY_LIMIT:]
             
-            self.save_users()
-            return True
-        return False
+            self._queue_append(username, "bmi_history", bmi_data)
+        self._commit()
+        return True
     
     def get_all_users(self):
         """Get all users (admin function)"""
-        return list(self.users.keys())
-
-# Global authentication instance
-auth_system = AuthenticationSystem()
\ No newline at end of file
+        return list(self.accounts.keys())
\ No newline at end of file
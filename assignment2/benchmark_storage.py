@@ -0,0 +1,105 @@
+"""Run the same workload against every storage backend and print the timings
+
+Usage: python benchmark_storage.py [--users N] [--days N] [--backends json,sqlite,...]
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from datetime import date, timedelta
+from storage import STORAGE_BACKENDS, create_store, account_record
+
+
+def make_user(username, days):
+    start = date(2020, 1, 1)
+    health_data = {}
+    for i in range(days):
+        health_data[(start + timedelta(days=i)).isoformat()] = {
+            "sleep": round(random.uniform(5, 9), 1),
+            "water": round(random.uniform(2, 10), 1),
+            "mood": random.randint(1, 5),
+            "meals": "Breakfast: Oatmeal with fruits\nLunch: Chicken salad",
+            "reflection": "Felt good today",
+            "timestamp": "2020-01-01 20:00:00",
+        }
+    return {
+        "username": username,
+        "password_hash": "0" * 64,
+        "email": "",
+        "profile": {"age": 30, "height": 170.0, "weight": 65.0, "gender": "female",
+                    "created_at": "2020-01-01 00:00:00", "last_login": ""},
+        "health_data": health_data,
+        "bmi_history": [],
+    }
+
+
+def timed(results, name, func, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    results[name] = (time.perf_counter() - start) / repeat * 1000
+
+
+def run_backend(backend, users, work_dir):
+    store = create_store(backend, os.path.join(work_dir, "users"),
+                         legacy_file=os.path.join(work_dir, "users.json"))
+    results = {}
+    usernames = list(users)
+    target = usernames[len(usernames) // 2]
+
+    def populate():
+        store.save_accounts({name: account_record(user) for name, user in users.items()})
+        for name, user in users.items():
+            store.save_user(name, user)
+
+    def append_entries():
+        for i in range(100):
+            store.append_health_entry(target, f"2099-01-{i % 28 + 1:02d}",
+                                      {"sleep": 8.0, "water": 8.0, "mood": 4})
+
+    def append_bmi():
+        for i in range(100):
+            store.append_bmi_record(target, {"bmi": 22.0 + i / 100, "height": 170, "weight": 65})
+
+    timed(results, "populate", populate)
+    timed(results, "list users", store.list_users, repeat=10)
+    timed(results, "load user", lambda: store.load_user(target), repeat=10)
+    timed(results, "save profile", lambda: store.save_user(target, users[target], ("profile",)), repeat=10)
+    timed(results, "100 daily entries", append_entries)
+    timed(results, "100 BMI records", append_bmi)
+    timed(results, "range query (1 month)",
+          lambda: store.query_health_range(target, "2021-03-01", "2021-03-31"), repeat=10)
+    store.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--backends", default=",".join(STORAGE_BACKENDS))
+    args = parser.parse_args()
+
+    random.seed(0)
+    users = {f"user{i:05d}": make_user(f"user{i:05d}", args.days) for i in range(args.users)}
+    backends = args.backends.split(",")
+
+    table = {}
+    for backend in backends:
+        work_dir = tempfile.mkdtemp(prefix=f"bench_{backend}_")
+        try:
+            table[backend] = run_backend(backend, users, work_dir)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(f"{args.users} users x {args.days} days (milliseconds)")
+    operations = list(next(iter(table.values())))
+    print(f"{'operation':<24}" + "".join(f"{backend:>12}" for backend in backends))
+    for operation in operations:
+        print(f"{operation:<24}" + "".join(f"{table[backend][operation]:>12.2f}" for backend in backends))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+"""Batch tasks on the health data without starting the GUI
+
+Usage: python cli.py [--backend NAME] [--data-dir DIR] [--users-file FILE] COMMAND ...
+
+    recompute      BMI, BMR and TDEE for every user with a complete profile
+    export         write one user's daily logs to JSON or CSV
+    import         merge daily logs from JSON or CSV into one user's data
+    compact        fold journals into their data files
+    report         averages and health score for one or all users
+    rebuild-index  regenerate the offset index of the single-file store
+
+Only the storage and computation modules are imported, never tkinter, so
+this works on machines without a display.
+"""
+import argparse
+import csv
+import json
+from datetime import date as Date
+import os
+import sys
+from storage import STORAGE_BACKENDS, create_store
+from date_index import DateIndex
+from aggregates import HealthAggregates, WINDOWS
+from health_stats import calculate_health_score, RECENT_DAYS
+import health_calc
+
+# Columns of exported/imported CSV logs
+LOG_FIELDS = ("date", "sleep", "water", "mood", "meals", "reflection", "timestamp")
+
+
+def open_store(args):
+    return create_store(args.backend, args.data_dir, args.users_file)
+
+
+def selected_users(store, args):
+    accounts = store.load_accounts()
+    if args.user is None:
+        return accounts
+    if args.user not in accounts:
+        raise SystemExit(f"Unknown user: {args.user}")
+    return {args.user: accounts[args.user]}
+
+
+def profile_measurements(profile):
+    """(age, gender, height, weight) from a profile, or None if incomplete"""
+    try:
+        return (int(profile["age"]), profile.get("gender", ""),
+                float(profile["height"]), float(profile["weight"]))
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+# ============ Commands ============
+def recompute_rows(usernames, measurements, activity, goal):
+    """BMI and calorie figures for many users in one vectorised pass"""
+    ages, genders, heights, weights = zip(*measurements)
+    report = health_calc.batch_bmi_report(heights, weights)
+    plan = health_calc.batch_calorie_plan(ages, genders, heights, weights,
+                                          [activity] * len(usernames), [goal] * len(usernames))
+    return [{
+        "username": username,
+        "bmi": round(float(report["bmi"][i]), 1),
+        "category": str(report["category"][i]),
+        "bmr": round(float(plan["bmr"][i])),
+        "tdee": round(float(plan["tdee"][i])),
+        "target": round(float(plan["target"][i])),
+    } for i, username in enumerate(usernames)]
+
+
+def recompute_rows_scalar(usernames, measurements, activity, goal):
+    """Same as recompute_rows() one user at a time, for machines without numpy"""
+    rows = []
+    for username, (age, gender, height, weight) in zip(usernames, measurements):
+        report = health_calc.bmi_report(height, weight)
+        plan = health_calc.calorie_plan(age, gender, height, weight, activity, goal)
+        rows.append({
+            "username": username,
+            "bmi": round(report["bmi"], 1),
+            "category": report["info"]["category"],
+            "bmr": round(plan["bmr"]),
+            "tdee": round(plan["tdee"]),
+            "target": round(plan["target"]),
+        })
+    return rows
+
+
+def cmd_recompute(store, args):
+    usernames, measured = [], []
+    for username, account in selected_users(store, args).items():
+        user = store.load_user(username, account)
+        measurements = profile_measurements(user.get("profile", {}))
+        if measurements is None:
+            print(f"Skipping {username}: profile needs age, height and weight", file=sys.stderr)
+            continue
+        usernames.append(username)
+        measured.append(measurements)
+
+    try:
+        health_calc.require_numpy()
+        recompute = recompute_rows
+    except RuntimeError:
+        recompute = recompute_rows_scalar
+    rows = recompute(usernames, measured, args.activity, args.goal) if usernames else []
+
+    if args.csv:
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["username", "bmi", "category", "bmr", "tdee", "target"])
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"Wrote {len(rows)} users to {args.csv}")
+    else:
+        print(f"{'user':<20}{'bmi':>7}  {'category':<12}{'bmr':>7}{'tdee':>7}{'target':>8}")
+        for row in rows:
+            print(f"{row['username']:<20}{row['bmi']:>7.1f}  {row['category']:<12}"
+                  f"{row['bmr']:>7}{row['tdee']:>7}{row['target']:>8}")
+
+
+def file_format(path, requested):
+    if requested:
+        return requested
+    return "csv" if path.lower().endswith(".csv") else "json"
+
+
+def cmd_export(store, args):
+    if args.user not in store.load_accounts():
+        raise SystemExit(f"Unknown user: {args.user}")
+    health_data = store.query_health_range(args.user, args.start, args.end)
+    if file_format(args.output, args.format) == "csv":
+        with open(args.output, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=LOG_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            for date in sorted(health_data):
+                writer.writerow(dict(health_data[date], date=date))
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(health_data, f, indent=4)
+    print(f"Exported {len(health_data)} days for {args.user} to {args.output}")
+
+
+def read_logs(path, fmt):
+    """Read {date: entry} from a file written by `export`"""
+    if fmt == "json":
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    logs = {}
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            entry = {field: row.get(field, "") for field in LOG_FIELDS[1:]}
+            entry["sleep"] = float(entry["sleep"] or 0)
+            entry["water"] = float(entry["water"] or 0)
+            entry["mood"] = int(entry["mood"] or 3)
+            logs[row["date"]] = entry
+    return logs
+
+
+def validate_logs(logs):
+    """Check that logs is {YYYY-MM-DD: entry dict}; raises ValueError naming the problem"""
+    if not isinstance(logs, dict):
+        raise ValueError("expected an object mapping dates to daily logs")
+    for date, entry in logs.items():
+        try:
+            canonical = Date.fromisoformat(date).isoformat()
+        except (TypeError, ValueError):
+            canonical = None
+        if canonical != date:
+            raise ValueError(f"{date!r} is not a YYYY-MM-DD date")
+        if not isinstance(entry, dict):
+            raise ValueError(f"the log for {date} is not an object")
+        for metric in ("sleep", "water", "mood"):
+            value = entry.get(metric, 0)
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"{metric} for {date} is not a number: {value!r}")
+    return logs
+
+
+def cmd_import(store, args):
+    accounts = store.load_accounts()
+    if args.user not in accounts:
+        raise SystemExit(f"Unknown user: {args.user}")
+    try:
+        logs = validate_logs(read_logs(args.input, file_format(args.input, args.format)))
+    except (OSError, ValueError, KeyError) as e:
+        raise SystemExit(f"Could not read {args.input}: {e}")
+
+    user = store.load_user(args.user, accounts[args.user])
+    if args.replace:
+        user["health_data"] = {}
+    user["health_data"].update(logs)
+    store.save_user(args.user, user, ("health_data",))
+    print(f"Imported {len(logs)} days for {args.user} ({len(user['health_data'])} total)")
+
+
+def cmd_compact(store, args):
+    written = store.compact_all()
+    print(f"Compacted {args.backend} storage ({written} bytes written)")
+
+
+def cmd_report(store, args):
+    for username, account in selected_users(store, args).items():
+        user = store.load_user(username, account)
+        health_data = user.get("health_data", {})
+        aggregates = HealthAggregates(health_data, DateIndex(health_data))
+
+        print(f"== {username} ==")
+        if not aggregates.count:
+            print("No health data logged\n")
+            continue
+
+        for n in WINDOWS:
+            window = aggregates.window(n)
+            print(f"Last {n:>2} logs: sleep {window['sleep']:.1f} h, water {window['water']:.1f} cups, "
+                  f"mood {window['mood']:.1f}/5 ({window['days']} days)")
+        lifetime = aggregates.lifetime()
+        print(f"All {lifetime['days']} logs: sleep {lifetime['sleep']['average']:.1f} h "
+              f"({lifetime['sleep']['min']:g}-{lifetime['sleep']['max']:g}), "
+              f"water {lifetime['water']['average']:.1f} cups, mood {lifetime['mood']['average']:.1f}/5")
+        recent = aggregates.window(RECENT_DAYS)
+        score = calculate_health_score(recent["sleep"], recent["water"], recent["mood"])
+        print(f"Health score: {score:.0f}/100\n")
+
+
+def cmd_rebuild_index(store, args):
+    if args.backend != "single":
+        raise SystemExit("rebuild-index only applies to the single-file backend (--backend single)")
+    entries = store.rebuild_index()
+    print(f"Indexed {len(entries)} users in {args.users_file}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Health & Wellness batch tasks")
+    parser.add_argument("--backend", choices=STORAGE_BACKENDS,
+                        default=os.environ.get("HEALTH_APP_STORAGE", "json"))
+    parser.add_argument("--data-dir", default="users")
+    parser.add_argument("--users-file", default="users.json")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    recompute = commands.add_parser("recompute", help="BMI, BMR and TDEE for every user")
+    recompute.add_argument("--user")
+    recompute.add_argument("--activity", choices=list(health_calc.ACTIVITY_MULTIPLIERS),
+                           default=health_calc.DEFAULT_ACTIVITY)
+    recompute.add_argument("--goal", choices=list(health_calc.GOAL_ADJUSTMENTS), default="maintain")
+    recompute.add_argument("--csv", help="write the results to this CSV file")
+    recompute.set_defaults(func=cmd_recompute)
+
+    export = commands.add_parser("export", help="write a user's daily logs to a file")
+    export.add_argument("user")
+    export.add_argument("output")
+    export.add_argument("--format", choices=["json", "csv"], help="default: from the file extension")
+    export.add_argument("--start", help="first date (YYYY-MM-DD)")
+    export.add_argument("--end", help="last date (YYYY-MM-DD)")
+    export.set_defaults(func=cmd_export)
+
+    import_ = commands.add_parser("import", help="merge daily logs from a file into a user's data")
+    import_.add_argument("user")
+    import_.add_argument("input")
+    import_.add_argument("--format", choices=["json", "csv"], help="default: from the file extension")
+    import_.add_argument("--replace", action="store_true", help="drop the user's existing logs first")
+    import_.set_defaults(func=cmd_import)
+
+    compact = commands.add_parser("compact", help="fold journals into their data files")
+    compact.set_defaults(func=cmd_compact)
+
+    report = commands.add_parser("report", help="averages and health score")
+    report.add_argument("--user")
+    report.set_defaults(func=cmd_report)
+
+    rebuild = commands.add_parser("rebuild-index", help="regenerate the single-file offset index")
+    rebuild.set_defaults(func=cmd_rebuild_index)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    store = open_store(args)
+    try:
+        args.func(store, args)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+from bisect import bisect_left, bisect_right
+
+
+class DateIndex:
+    """A user's logged dates ("YYYY-MM-DD") kept in sorted order
+
+    ISO date strings sort chronologically, so lookups are binary searches
+    and only the requested slice is copied out.
+    """
+
+    def __init__(self, dates=()):
+        self._dates = sorted(dates)
+
+    def __len__(self):
+        return len(self._dates)
+
+    def __contains__(self, date):
+        i = bisect_left(self._dates, date)
+        return i < len(self._dates) and self._dates[i] == date
+
+    def __iter__(self):
+        return iter(self._dates)
+
+    def add(self, date):
+        i = bisect_left(self._dates, date)
+        if i == len(self._dates) or self._dates[i] != date:
+            self._dates.insert(i, date)
+
+    def remove(self, date):
+        i = bisect_left(self._dates, date)
+        if i < len(self._dates) and self._dates[i] == date:
+            del self._dates[i]
+
+    def newest(self):
+        return self._dates[-1] if self._dates else None
+
+    def oldest(self):
+        return self._dates[0] if self._dates else None
+
+    def newest_first(self):
+        return self._dates[::-1]
+
+    def latest(self, n):
+        """The n most recent dates, newest first"""
+        if n <= 0:
+            return []
+        return self._dates[:-n - 1:-1]
+
+    def before(self, date, n=None):
+        """Dates strictly before `date`, newest first (at most n)"""
+        end = bisect_left(self._dates, date)
+        start = 0 if n is None else max(0, end - n)
+        return self._dates[start:end][::-1]
+
+    def after(self, date, n=None):
+        """Dates strictly after `date`, oldest first (at most n)"""
+        start = bisect_right(self._dates, date)
+        end = len(self._dates) if n is None else start + n
+        return self._dates[start:end]
+
+    def between(self, start=None, end=None):
+        """Dates with start <= date <= end, oldest first (either bound optional)"""
+        lo = 0 if start is None else bisect_left(self._dates, start)
+        hi = len(self._dates) if end is None else bisect_right(self._dates, end)
+        return self._dates[lo:hi]
@@ -0,0 +1,180 @@
+# BMI, BMR/TDEE and healthy-weight maths shared by the calculator screens
+# and batch jobs. batch_* functions take equal-length sequences (or numpy
+# arrays) and need numpy; everything else is plain Python.
+
+# numpy, imported by require_numpy() on the first batch call so the screens
+# and scalar users never pay for it
+np = None
+
+# (upper bound, classification) in ascending order; the last has no bound
+BMI_CATEGORIES = [
+    (18.5, {
+        "category": "Underweight",
+        "color": "#4FC3F7",
+        "emoji": "💙",
+        "message": "You may need to gain some weight",
+        "advice": "• Increase calorie intake\n• Include protein-rich foods\n• Consider strength training"
+    }),
+    (25, {
+        "category": "Normal",
+        "color": "#81C784",
+        "emoji": "✅",
+        "message": "Great! You're at a healthy weight",
+        "advice": "• Maintain balanced diet\n• Regular exercise\n• Stay hydrated"
+    }),
+    (30, {
+        "category": "Overweight",
+        "color": "#FFB74D",
+        "emoji": "⚠️",
+        "message": "Consider losing some weight",
+        "advice": "• Reduce processed foods\n• Increase physical activity\n• Portion control"
+    }),
+    (None, {
+        "category": "Obese",
+        "color": "#E57373",
+        "emoji": "❗",
+        "message": "Weight loss is recommended",
+        "advice": "• Consult healthcare provider\n• Start gradual weight loss\n• Focus on whole foods"
+    }),
+]
+
+# BMI bounds of the healthy weight range
+HEALTHY_BMI_MIN = 18.5
+HEALTHY_BMI_MAX = 24.9
+
+# Mifflin-St Jeor constant by gender (anything but "male" uses the female one)
+BMR_GENDER_OFFSETS = {"male": 5, "female": -161}
+
+ACTIVITY_MULTIPLIERS = {
+    "sedentary": 1.2,
+    "light": 1.375,
+    "moderate": 1.55,
+    "active": 1.725,
+    "very_active": 1.9
+}
+DEFAULT_ACTIVITY = "moderate"
+
+# Daily calorie change for each goal
+GOAL_ADJUSTMENTS = {"lose": -500, "maintain": 0, "gain": 500}
+
+
+def require_numpy():
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            raise RuntimeError("Batch calculations need numpy (pip install numpy)")
+        np = numpy
+    return np
+
+
+# ============ Scalar API ============
+def calculate_bmi(height_cm, weight_kg):
+    height_m = height_cm / 100
+    return weight_kg / (height_m * height_m)
+
+
+def get_bmi_category_info(bmi):
+    """Return classification information based on BMI value"""
+    for upper, info in BMI_CATEGORIES:
+        if upper is None or bmi < upper:
+            return dict(info)
+
+
+def healthy_weight_range(height_cm):
+    """(minimum, maximum) healthy weight in kg for a height"""
+    height_m = height_cm / 100
+    return HEALTHY_BMI_MIN * height_m * height_m, HEALTHY_BMI_MAX * height_m * height_m
+
+
+def calculate_bmr(weight_kg, height_cm, age, gender):
+    """Basal metabolic rate (Mifflin-St Jeor), calories/day"""
+    offset = BMR_GENDER_OFFSETS["male"] if gender == "male" else BMR_GENDER_OFFSETS["female"]
+    return 10 * weight_kg + 6.25 * height_cm - 5 * age + offset
+
+
+def calculate_tdee(bmr, activity):
+    """Total daily energy expenditure for an activity level"""
+    return bmr * ACTIVITY_MULTIPLIERS.get(activity, ACTIVITY_MULTIPLIERS[DEFAULT_ACTIVITY])
+
+
+def target_calories(tdee, goal):
+    return tdee + GOAL_ADJUSTMENTS.get(goal, 0)
+
+
+def bmi_report(height_cm, weight_kg):
+    """BMI, its classification and the healthy weight range for one person"""
+    bmi = calculate_bmi(height_cm, weight_kg)
+    min_weight, max_weight = healthy_weight_range(height_cm)
+    return {
+        "bmi": bmi,
+        "info": get_bmi_category_info(bmi),
+        "min_weight": min_weight,
+        "max_weight": max_weight,
+    }
+
+
+def calorie_plan(age, gender, height_cm, weight_kg, activity, goal):
+    """BMR, TDEE and target intake for one person"""
+    bmr = calculate_bmr(weight_kg, height_cm, age, gender)
+    tdee = calculate_tdee(bmr, activity)
+    return {"bmr": bmr, "tdee": tdee, "target": target_calories(tdee, goal)}
+
+
+# ============ Batch API ============
+def batch_bmi(heights_cm, weights_kg):
+    require_numpy()
+    height_m = np.asarray(heights_cm, dtype=np.float64) / 100
+    return np.asarray(weights_kg, dtype=np.float64) / (height_m * height_m)
+
+
+def batch_bmi_categories(bmis):
+    """Category name for each BMI, as an array of strings"""
+    require_numpy()
+    bounds = [upper for upper, _ in BMI_CATEGORIES if upper is not None]
+    names = np.array([info["category"] for _, info in BMI_CATEGORIES])
+    return names[np.searchsorted(bounds, np.asarray(bmis, dtype=np.float64), side="right")]
+
+
+def batch_healthy_weight_range(heights_cm):
+    """(minimums, maximums) arrays of healthy weight in kg"""
+    require_numpy()
+    height_m = np.asarray(heights_cm, dtype=np.float64) / 100
+    squared = height_m * height_m
+    return HEALTHY_BMI_MIN * squared, HEALTHY_BMI_MAX * squared
+
+
+def batch_bmr(weights_kg, heights_cm, ages, genders):
+    require_numpy()
+    offsets = np.where(np.asarray(genders) == "male",
+                       BMR_GENDER_OFFSETS["male"], BMR_GENDER_OFFSETS["female"])
+    return (10 * np.asarray(weights_kg, dtype=np.float64) +
+            6.25 * np.asarray(heights_cm, dtype=np.float64) -
+            5 * np.asarray(ages, dtype=np.float64) + offsets)
+
+
+def _lookup(table, keys, default):
+    """Map an array of keys through a dict, vectorised over the distinct keys"""
+    keys = np.asarray(keys)
+    uniques, inverse = np.unique(keys, return_inverse=True)
+    values = np.array([table.get(key, default) for key in uniques.tolist()], dtype=np.float64)
+    return values[inverse.reshape(keys.shape)]
+
+
+def batch_calorie_plan(ages, genders, heights_cm, weights_kg, activities, goals):
+    """Arrays of BMR, TDEE and target intake for many people"""
+    bmr = batch_bmr(weights_kg, heights_cm, ages, genders)
+    tdee = bmr * _lookup(ACTIVITY_MULTIPLIERS, activities, ACTIVITY_MULTIPLIERS[DEFAULT_ACTIVITY])
+    return {"bmr": bmr, "tdee": tdee, "target": tdee + _lookup(GOAL_ADJUSTMENTS, goals, 0)}
+
+
+def batch_bmi_report(heights_cm, weights_kg):
+    bmi = batch_bmi(heights_cm, weights_kg)
+    min_weight, max_weight = batch_healthy_weight_range(heights_cm)
+    return {
+        "bmi": bmi,
+        "category": batch_bmi_categories(bmi),
+        "min_weight": min_weight,
+        "max_weight": max_weight,
+    }
@@ -0,0 +1,106 @@
+RECENT_DAYS = 7
+
+
+def calculate_health_score(sleep, water, mood):
+    """Calculate health score (0-100)"""
+    # Sleep score (0-40 points)
+    sleep_score = 0
+    if sleep >= 7 and sleep <= 9:
+        sleep_score = 40  # Ideal range
+    elif sleep >= 6 and sleep <= 10:
+        sleep_score = 30  # Acceptable range
+    elif sleep >= 5 and sleep <= 11:
+        sleep_score = 20  # Marginal range
+    else:
+        sleep_score = 10  # Unhealthy
+
+    # Water score (0-30 points)
+    water_score = min(water / 10 * 30, 30)  # 10 cups gets 30 points
+
+    # Mood score (0-30 points)
+    mood_score = (mood / 5) * 30  # 5 points gets 30 points
+
+    total_score = sleep_score + water_score + mood_score
+
+    # Ensure between 0-100
+    return min(max(total_score, 0), 100)
+
+
+class HealthStats:
+    """Statistics shared by the History and Reports screens
+
+    Results are cached per user together with the user's data version from
+    AuthenticationSystem, which changes on add_health_data() and
+    update_user_profile(); until then every screen reuses the same result.
+    Everything runs under the AuthenticationSystem lock, so the screens can
+    call these from task executor threads while the Tk thread adds data.
+    """
+
+    def __init__(self, auth):
+        self.auth = auth
+        self._cache = {}
+        self._highlights = {}
+        self.hits = 0
+        self.misses = 0
+
+    def summary(self, username=None):
+        """Recent averages, health score and latest entries; None for unknown users"""
+        if username is None:
+            username = self.auth.current_user
+
+        with self.auth._lock:
+            version = self.auth.get_data_version(username)
+            cached = self._cache.get(username)
+            if cached is not None and cached[0] == version:
+                self.hits += 1
+                return cached[1]
+
+            self.misses += 1
+            summary = self._summarize(username)
+            if summary is not None:
+                self._cache[username] = (version, summary)
+            return summary
+
+    def _summarize(self, username):
+        aggregates = self.auth.get_health_aggregates(username)
+        if aggregates is None:
+            return None
+
+        recent = aggregates.window(RECENT_DAYS)
+        summary = {
+            "total_days": aggregates.count,
+            "recent_days": recent["days"],
+            "avg_sleep": recent["sleep"],
+            "avg_water": recent["water"],
+            "avg_mood": recent["mood"],
+            "health_score": calculate_health_score(recent["sleep"], recent["water"], recent["mood"]),
+            # Newest first
+            "recent": self.auth.get_latest(RECENT_DAYS, username),
+        }
+        return summary
+
+    def score_highlights(self, username=None):
+        """Best/worst week, streaks and trend of the daily scores (needs numpy)"""
+        if username is None:
+            username = self.auth.current_user
+
+        with self.auth._lock:
+            version = self.auth.get_data_version(username)
+            cached = self._highlights.get(username)
+            if cached is not None and cached[0] == version:
+                return cached[1]
+
+            analytics = self.auth.get_health_analytics(username)
+            if analytics is None:
+                return None
+            highlights = analytics.score_highlights()
+            self._highlights[username] = (version, highlights)
+            return highlights
+
+    def invalidate(self, username=None):
+        if username is None:
+            self._cache.clear()
+            self._highlights.clear()
+        else:
+            self._cache.pop(username, None)
+            self._highlights.pop(username, None)
@@ -1,9 +1,29 @@
+import time
+START_TIME = time.perf_counter()
+
+import os
+import sys
 from app import * 
 import tkinter as tk
 
+IMPORTED_TIME = time.perf_counter()
+
+# Print startup timings when HEALTH_APP_TIMING is set
+def report_startup(app):
+    first_frame = time.perf_counter()
+    screens = sorted(name for name in sys.modules if name.startswith("ui_"))
+    print(f"Imports: {(IMPORTED_TIME - START_TIME) * 1000:.1f} ms")
+    print(f"Time to first frame: {(first_frame - START_TIME) * 1000:.1f} ms")
+    print(f"UI modules loaded at first frame: {', '.join(screens)}")
+    for module_name, seconds in app.screen_load_times.items():
+        print(f"  {module_name}: {seconds * 1000:.1f} ms")
+
 def main():
     root = tk.Tk()
     app = HealthWellnessApp(root)
+    if os.environ.get("HEALTH_APP_TIMING"):
+        # Runs once the first frame has been drawn and the event loop is idle
+        root.after(0, lambda: root.after_idle(report_startup, app))
     root.mainloop()
 
 if __name__ == "__main__":
@@ -0,0 +1,194 @@
+import json
+import os
+import zlib
+from snapshot_cache import load_json_cached, write_snapshot
+
+INDEX_VERSION = 1
+
+# Fields copied into the index so logins never need to open a record
+INDEX_ACCOUNT_FIELDS = ("username", "password_hash", "email")
+
+
+class StaleIndexError(Exception):
+    """The index no longer matches the data file"""
+
+
+def entries_checksum(entries):
+    return zlib.crc32(json.dumps(entries, sort_keys=True).encode("utf-8"))
+
+
+def scan_records(data):
+    """Find (username, start, end) byte spans of the top-level values in a JSON object"""
+    # latin-1 maps every byte to one character, so string positions are byte offsets
+    text = data.decode("latin-1")
+    decoder = json.JSONDecoder()
+    spans = []
+
+    def skip_ws(pos):
+        while pos < len(text) and text[pos] in " \t\r\n":
+            pos += 1
+        return pos
+
+    pos = skip_ws(0)
+    if pos == len(text):
+        return spans
+    if text[pos] != "{":
+        raise ValueError("Data file is not a JSON object")
+    pos = skip_ws(pos + 1)
+    if text[pos] == "}":
+        return spans
+
+    while True:
+        key_start = pos
+        _, pos = decoder.raw_decode(text, pos)
+        username = json.loads(data[key_start:pos].decode("utf-8"))
+        pos = skip_ws(pos)
+        if text[pos] != ":":
+            raise ValueError(f"Expected ':' at byte {pos}")
+        start = skip_ws(pos + 1)
+        _, end = decoder.raw_decode(text, start)
+        spans.append((username, start, end))
+        pos = skip_ws(end)
+        if text[pos] == "}":
+            return spans
+        if text[pos] != ",":
+            raise ValueError(f"Expected ',' at byte {pos}")
+        pos = skip_ws(pos + 1)
+
+
+def serialize_record(user):
+    """Serialize one user exactly as json.dump(users, indent=4) would nest it"""
+    return json.dumps(user, indent=4).replace("\n", "\n    ").encode("utf-8")
+
+
+class OffsetIndex:
+    """Sidecar index (<data file>.idx) of where each user's record sits in the data file
+
+    Each entry holds the record's byte offset, length and CRC-32 plus the
+    account fields, so a login reads the small index and then seeks to one
+    record. The index carries a checksum of its own entries and the size and
+    mtime of the data file it describes; load() reports a missing, corrupt
+    or stale index so the caller can rebuild() it. To rebuild by hand:
+    python cli.py --backend single [--users-file FILE] rebuild-index
+    """
+
+    def __init__(self, data_file):
+        self.data_file = data_file
+        self.index_file = data_file + ".idx"
+        self.entries = {}
+        # (size, mtime_ns) of the data file the entries describe
+        self.data_stat = None
+
+    def load(self):
+        """Read the index; False when it is missing, corrupt or stale"""
+        try:
+            index = load_json_cached(self.index_file)
+        except (OSError, ValueError):
+            return False
+
+        if index.get("version") != INDEX_VERSION:
+            return False
+        if index.get("checksum") != entries_checksum(index.get("entries")):
+            return False
+        self.data_stat = (index.get("data_size"), index.get("data_mtime_ns"))
+        if not os.path.exists(self.data_file) or not self.is_current():
+            return False
+
+        self.entries = index["entries"]
+        return True
+
+    def is_current(self):
+        """True while the data file is still the one the entries were built from"""
+        if not os.path.exists(self.data_file):
+            return not self.entries
+        stat = os.stat(self.data_file)
+        return (stat.st_size, stat.st_mtime_ns) == self.data_stat
+
+    def rebuild(self):
+        """Scan the data file and write a fresh index"""
+        if not os.path.exists(self.data_file):
+            self.entries = {}
+            return self.entries
+
+        with open(self.data_file, "rb") as f:
+            data = f.read()
+
+        entries = {}
+        for username, start, end in scan_records(data):
+            record = data[start:end]
+            user = json.loads(record.decode("utf-8"))
+            entries[username] = self._entry(user, start, record)
+        self.entries = entries
+        self.save()
+        return entries
+
+    def _entry(self, user, offset, record):
+        return {
+            "offset": offset,
+            "length": len(record),
+            "crc32": zlib.crc32(record),
+            "account": {field: user.get(field, "") for field in INDEX_ACCOUNT_FIELDS},
+        }
+
+    def save(self):
+        stat = os.stat(self.data_file)
+        self.data_stat = (stat.st_size, stat.st_mtime_ns)
+        index = {
+            "version": INDEX_VERSION,
+            "data_size": stat.st_size,
+            "data_mtime_ns": stat.st_mtime_ns,
+            "entries": self.entries,
+            "checksum": entries_checksum(self.entries),
+        }
+        payload = json.dumps(index).encode("utf-8")
+        tmp_path = self.index_file + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.index_file)
+        write_snapshot(self.index_file, index, payload)
+        return len(payload)
+
+    def read_record(self, username):
+        """Return the raw bytes of one record, verified against its checksum"""
+        entry = self.entries[username]
+        with open(self.data_file, "rb") as f:
+            f.seek(entry["offset"])
+            record = f.read(entry["length"])
+        if zlib.crc32(record) != entry["crc32"]:
+            raise StaleIndexError(f"Record for {username!r} does not match the index")
+        return record
+
+    def write(self, records):
+        """Write [(username, user or raw record bytes)] as the data file and re-index it"""
+        out = bytearray(b"{")
+        entries = {}
+        for i, (username, record) in enumerate(records):
+            if isinstance(record, dict):
+                user, record = record, serialize_record(record)
+            else:
+                user = None
+            out += b"\n    " + json.dumps(username).encode("utf-8") + b": "
+            offset = len(out)
+            out += record
+            if i < len(records) - 1:
+                out += b","
+
+            if user is None:
+                entry = dict(self.entries[username])
+                entry["offset"] = offset
+            else:
+                entry = self._entry(user, offset, record)
+            entries[username] = entry
+        out += b"\n}" if records else b"}"
+
+        tmp_path = self.data_file + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(out)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.data_file)
+
+        self.entries = entries
+        return len(out) + self.save()
@@ -0,0 +1,111 @@
+"""Salted scrypt password hashing
+
+Hashes are stored as "scrypt$<n>$<r>$<p>$<salt>$<key>" (salt and key in
+base64). Plain 64-character SHA-256 hex digests from older versions still
+verify, and needs_rehash() reports them so they can be upgraded at login.
+
+Usage: python passwords.py [--target-ms MS]   time scrypt at several costs
+"""
+import base64
+import hashlib
+import hmac
+import os
+import time
+
+# Cost parameters; raise SCRYPT_N as hardware allows (see benchmark())
+SCRYPT_N = int(os.environ.get("HEALTH_APP_SCRYPT_N", 2 ** 14))
+SCRYPT_R = int(os.environ.get("HEALTH_APP_SCRYPT_R", 8))
+SCRYPT_P = int(os.environ.get("HEALTH_APP_SCRYPT_P", 1))
+SALT_BYTES = 16
+KEY_BYTES = 32
+SCHEME = "scrypt"
+
+
+def _b64(data):
+    return base64.b64encode(data).decode("ascii")
+
+
+def _derive(password, salt, n, r, p):
+    # scrypt needs about 128 * n * r bytes; leave headroom over OpenSSL's default cap
+    return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p,
+                          maxmem=256 * n * r + 1024 * 1024, dklen=KEY_BYTES)
+
+
+def hash_password(password, n=None, r=None, p=None):
+    n = SCRYPT_N if n is None else n
+    r = SCRYPT_R if r is None else r
+    p = SCRYPT_P if p is None else p
+    salt = os.urandom(SALT_BYTES)
+    key = _derive(password, salt, n, r, p)
+    return f"{SCHEME}${n}${r}${p}${_b64(salt)}${_b64(key)}"
+
+
+def legacy_hash(password):
+    """The unsalted SHA-256 digest used before scrypt"""
+    return hashlib.sha256(password.encode()).hexdigest()
+
+
+def is_legacy(stored_hash):
+    return "$" not in stored_hash
+
+
+def _parse(stored_hash):
+    scheme, n, r, p, salt, key = stored_hash.split("$")
+    if scheme != SCHEME:
+        raise ValueError(f"Unknown password hash scheme: {scheme}")
+    n, r, p = int(n), int(r), int(p)
+    # scrypt itself rejects these, but as an error rather than a failed check
+    if n < 2 or n & (n - 1) or r < 1 or p < 1:
+        raise ValueError(f"Invalid scrypt parameters: n={n} r={r} p={p}")
+    return n, r, p, base64.b64decode(salt, validate=True), base64.b64decode(key, validate=True)
+
+
+def verify_password(password, stored_hash):
+    if is_legacy(stored_hash):
+        return hmac.compare_digest(legacy_hash(password), stored_hash)
+    try:
+        n, r, p, salt, key = _parse(stored_hash)
+    except ValueError:
+        return False
+    return hmac.compare_digest(_derive(password, salt, n, r, p), key)
+
+
+def needs_rehash(stored_hash):
+    """True for legacy hashes and scrypt hashes made with other cost parameters"""
+    if is_legacy(stored_hash):
+        return True
+    try:
+        n, r, p, _, _ = _parse(stored_hash)
+    except ValueError:
+        return True
+    return (n, r, p) != (SCRYPT_N, SCRYPT_R, SCRYPT_P)
+
+
+def benchmark(n_values=(2 ** 12, 2 ** 13, 2 ** 14, 2 ** 15, 2 ** 16, 2 ** 17), r=SCRYPT_R, p=SCRYPT_P):
+    """Return [(n, seconds per hash)] for each cost"""
+    salt = os.urandom(SALT_BYTES)
+    timings = []
+    for n in n_values:
+        start = time.perf_counter()
+        _derive("benchmark password", salt, n, r, p)
+        timings.append((n, time.perf_counter() - start))
+    return timings
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Time scrypt at several cost settings")
+    parser.add_argument("--target-ms", type=float, default=250,
+                        help="largest acceptable time per login (default 250)")
+    args = parser.parse_args()
+
+    print(f"r={SCRYPT_R} p={SCRYPT_P}, current n={SCRYPT_N}")
+    print(f"{'n':>8}{'memory':>10}{'ms':>10}")
+    suggested = None
+    for n, seconds in benchmark():
+        print(f"{n:>8}{128 * n * SCRYPT_R // (1024 * 1024):>8}MB{seconds * 1000:>10.1f}")
+        if seconds * 1000 <= args.target_ms:
+            suggested = n
+    if suggested:
+        print(f"Largest n within {args.target_ms:g} ms: {suggested} (set HEALTH_APP_SCRYPT_N)")
@@ -0,0 +1,111 @@
+import queue
+import threading
+import time
+
+# Seconds to wait after the first unsaved change before writing
+FLUSH_DELAY = 0.5
+
+# How often (ms) the Tk thread checks for finished writes
+POLL_INTERVAL_MS = 100
+
+
+class PersistenceWorker:
+    """Flushes AuthenticationSystem changes on a background thread
+
+    Mutations call request_flush(); every request arriving within `delay`
+    seconds of the first one is coalesced into a single auth.flush(). The
+    outcome of each write is put on a queue that the Tk thread drains with
+    root.after, so callbacks (and error dialogs) always run on the UI thread.
+    Given a tasks.TaskExecutor, results are handed to its queue instead of
+    being polled for separately.
+    """
+
+    def __init__(self, auth, root=None, delay=FLUSH_DELAY, on_complete=None, executor=None):
+        self.auth = auth
+        self.root = root
+        self.delay = delay
+        self.on_complete = on_complete
+        self.executor = executor
+        self.results = queue.Queue()
+        self.last_error = None
+
+        self._cond = threading.Condition()
+        self._requested_at = None
+        self._callbacks = []
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="persistence", daemon=True)
+
+    def start(self):
+        self.auth.set_persistence(self)
+        self._thread.start()
+        if self.root is not None and self.executor is None:
+            self.root.after(POLL_INTERVAL_MS, self._poll)
+        return self
+
+    def request_flush(self, callback=None):
+        """Schedule a write; callback(written, error) runs on the Tk thread"""
+        with self._cond:
+            if self._requested_at is None:
+                self._requested_at = time.monotonic()
+            if callback is not None:
+                self._callbacks.append(callback)
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._requested_at is None and not self._stopping:
+                    self._cond.wait()
+                if self._requested_at is None:
+                    return
+
+                # Let further changes pile up until the window closes
+                deadline = self._requested_at + self.delay
+                while not self._stopping and time.monotonic() < deadline:
+                    self._cond.wait(deadline - time.monotonic())
+
+                callbacks = self._callbacks
+                self._callbacks = []
+                self._requested_at = None
+
+            self._flush(callbacks)
+
+    def _flush(self, callbacks):
+        written, error = 0, None
+        try:
+            written = self.auth.flush()
+        except Exception as e:
+            error = e
+            self.last_error = e
+        self.results.put((callbacks, written, error))
+        if self.executor is not None and not self._stopping:
+            self.executor.post(self.drain)
+
+    # Deliver finished writes on the Tk thread
+    def _poll(self):
+        self.drain()
+        if not self._stopping:
+            self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def drain(self):
+        while True:
+            try:
+                callbacks, written, error = self.results.get_nowait()
+            except queue.Empty:
+                return
+            for callback in callbacks:
+                callback(written, error)
+            if self.on_complete is not None:
+                self.on_complete(written, error)
+
+    def stop(self):
+        """Write everything still pending and stop the thread"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join()
+
+        self.auth.set_persistence(None)
+        if self.auth.has_pending_changes():
+            self._flush([])
+        self.drain()
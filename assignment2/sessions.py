@@ -0,0 +1,104 @@
+import hashlib
+import os
+import secrets
+import threading
+import time
+from storage import read_json, write_json_atomic
+
+# How long a "remember me" sign-in lasts
+SESSION_LIFETIME = 30 * 24 * 60 * 60
+
+# The token file signs in without a password, so only its owner may read it
+PRIVATE_FILE_MODE = 0o600
+
+
+def token_hash(token):
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class SessionStore:
+    """Remember-me sessions kept apart from the user data
+
+    sessions_file maps SHA-256(token) -> {username, created, expires}, so a
+    copy of it cannot be used to sign in; the raw token of this machine's
+    remembered user lives in token_file. Both are small JSON files readable
+    only by their owner (mode 0600), and a session is revoked by deleting
+    its entry.
+    """
+
+    def __init__(self, sessions_file, token_file, lifetime=SESSION_LIFETIME):
+        self.sessions_file = sessions_file
+        self.token_file = token_file
+        self.lifetime = lifetime
+        self._lock = threading.Lock()
+
+    def _read(self, path, default):
+        try:
+            return read_json(path, default)
+        except ValueError:
+            # A damaged file only costs the remembered sign-ins
+            return default
+
+    def _load(self):
+        sessions = self._read(self.sessions_file, {})
+        now = time.time()
+        return {key: session for key, session in sessions.items() if session.get("expires", 0) > now}
+
+    def _write(self, path, data):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        write_json_atomic(path, data, mode=PRIVATE_FILE_MODE)
+
+    def _save(self, sessions):
+        self._write(self.sessions_file, sessions)
+
+    def create(self, username):
+        """Start a session for username and remember its token on this machine"""
+        token = secrets.token_urlsafe(32)
+        now = time.time()
+        with self._lock:
+            sessions = self._load()
+            sessions[token_hash(token)] = {"username": username, "created": now,
+                                           "expires": now + self.lifetime}
+            self._save(sessions)
+            self._write(self.token_file, {"username": username, "token": token})
+        return token
+
+    def validate(self, token):
+        """Return the username of a live session, or None"""
+        with self._lock:
+            session = self._load().get(token_hash(token))
+        return session["username"] if session else None
+
+    def revoke(self, token):
+        with self._lock:
+            sessions = self._load()
+            if sessions.pop(token_hash(token), None) is not None:
+                self._save(sessions)
+
+    def revoke_user(self, username):
+        """End every session of a user, e.g. after a password change"""
+        with self._lock:
+            sessions = self._load()
+            remaining = {key: session for key, session in sessions.items()
+                         if session["username"] != username}
+            self._save(remaining)
+
+    def restore(self):
+        """Username of the remembered sign-in on this machine, or None"""
+        saved = self._read(self.token_file, None)
+        if not saved or "token" not in saved:
+            return None
+        username = self.validate(saved["token"])
+        if username is None or username != saved.get("username"):
+            self.forget()
+            return None
+        return username
+
+    def forget(self):
+        """Revoke this machine's remembered session"""
+        saved = self._read(self.token_file, None)
+        if saved and "token" in saved:
+            self.revoke(saved["token"])
+        with self._lock:
+            if os.path.exists(self.token_file):
+                os.remove(self.token_file)
@@ -0,0 +1,57 @@
+import hashlib
+import json
+import marshal
+import os
+
+# Bumped whenever the snapshot layout changes
+SNAPSHOT_VERSION = 1
+
+
+def snapshot_path(path):
+    return path + ".cache"
+
+
+def content_digest(payload):
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+def write_snapshot(path, data, payload):
+    """Store the parsed form of a JSON file that was just written with `payload`"""
+    stat = os.stat(path)
+    snapshot = marshal.dumps((SNAPSHOT_VERSION, stat.st_mtime_ns, stat.st_size,
+                              content_digest(payload), data))
+    tmp_path = snapshot_path(path) + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(snapshot)
+    os.replace(tmp_path, snapshot_path(path))
+
+
+def load_json_cached(path):
+    """Load a JSON file, preferring its marshal snapshot when that is still valid
+
+    The snapshot (<path>.cache) is only used when the JSON file's mtime,
+    size and content hash all match the ones recorded with it; otherwise the
+    JSON is parsed and the snapshot regenerated. Snapshots are only ever
+    read from our own data directory, since marshal is not a safe format
+    for untrusted input.
+    """
+    with open(path, "rb") as f:
+        payload = f.read()
+    stat = os.stat(path)
+
+    try:
+        with open(snapshot_path(path), "rb") as f:
+            version, mtime_ns, size, digest, data = marshal.loads(f.read())
+        if (version == SNAPSHOT_VERSION and mtime_ns == stat.st_mtime_ns and
+                size == stat.st_size and digest == content_digest(payload)):
+            return data
+    except (OSError, ValueError, EOFError, TypeError):
+        pass
+
+    data = json.loads(payload)
+    try:
+        write_snapshot(path, data, payload)
+    except (OSError, ValueError):
+        # Unmarshallable content or read-only directory: JSON alone still works
+        pass
+    return data
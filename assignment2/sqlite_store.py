@@ -0,0 +1,201 @@
+import json
+import os
+import sqlite3
+import threading
+from storage import StorageBackend, SECTIONS, BMI_HISTORY_LIMIT, read_json, account_record
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    username TEXT PRIMARY KEY,
+    password_hash TEXT NOT NULL,
+    email TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS profiles (
+    username TEXT PRIMARY KEY REFERENCES accounts(username),
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS health_entries (
+    username TEXT NOT NULL REFERENCES accounts(username),
+    date TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (username, date)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_health_entries_date ON health_entries(date);
+CREATE TABLE IF NOT EXISTS bmi_records (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL REFERENCES accounts(username),
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_bmi_records_username ON bmi_records(username, id);
+CREATE TABLE IF NOT EXISTS activity (
+    username TEXT PRIMARY KEY REFERENCES accounts(username),
+    data TEXT NOT NULL
+);
+"""
+
+
+class SQLiteUserStore(StorageBackend):
+    """StorageBackend on a SQLite database
+
+    Every write runs in its own transaction and touches only the rows it
+    changes. Health entries are keyed on (username, date), so date-range
+    reads for one user are index scans.
+    """
+
+    def __init__(self, db_file="users.db", legacy_file="users.json"):
+        self.db_file = db_file
+        self.legacy_file = legacy_file
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+        if self.legacy_file and os.path.exists(self.legacy_file) and self._is_empty():
+            self.migrate(read_json(self.legacy_file, {}))
+
+    def _is_empty(self):
+        return self.conn.execute("SELECT 1 FROM accounts LIMIT 1").fetchone() is None
+
+    def migrate(self, users):
+        """Import a {username: user} document"""
+        self.save_accounts({username: account_record(user) for username, user in users.items()})
+        for username, user in users.items():
+            self.save_user(username, user)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    # Load account index
+    def load_accounts(self):
+        with self._lock:
+            rows = self.conn.execute("SELECT username, password_hash, email FROM accounts").fetchall()
+        return {username: {"username": username, "password_hash": password_hash, "email": email}
+                for username, password_hash, email in rows}
+
+    def save_accounts(self, accounts):
+        rows = [(username, account["password_hash"], account.get("email", ""))
+                for username, account in accounts.items()]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT INTO accounts (username, password_hash, email) VALUES (?, ?, ?) "
+                "ON CONFLICT(username) DO UPDATE SET password_hash = excluded.password_hash, "
+                "email = excluded.email",
+                rows)
+        return sum(len(username) + len(password_hash) + len(email)
+                   for username, password_hash, email in rows)
+
+    # Load one user's full record
+    def load_user(self, username, account=None):
+        with self._lock:
+            if account is None:
+                account = self.load_accounts().get(username)
+                if account is None:
+                    return None
+
+            user = dict(account)
+            row = self.conn.execute("SELECT data FROM profiles WHERE username = ?",
+                                    (username,)).fetchone()
+            user["profile"] = json.loads(row[0]) if row else {}
+            user["health_data"] = {
+                date: json.loads(data) for date, data in self.conn.execute(
+                    "SELECT date, data FROM health_entries WHERE username = ? ORDER BY date",
+                    (username,))
+            }
+            user["bmi_history"] = self._load_bmi_history(username)
+        return user
+
+    def _load_bmi_history(self, username):
+        rows = self.conn.execute(
+            "SELECT data FROM bmi_records WHERE username = ? ORDER BY id DESC LIMIT ?",
+            (username, BMI_HISTORY_LIMIT)).fetchall()
+        return [json.loads(data) for (data,) in reversed(rows)]
+
+    # Save selected sections of one user
+    def save_user(self, username, user, sections=SECTIONS):
+        written = 0
+        with self._lock, self.conn:
+            if "profile" in sections:
+                data = json.dumps(user.get("profile", {}))
+                self.conn.execute("INSERT OR REPLACE INTO profiles (username, data) VALUES (?, ?)",
+                                  (username, data))
+                written += len(data)
+
+            if "health_data" in sections:
+                rows = [(username, date, json.dumps(entry))
+                        for date, entry in user.get("health_data", {}).items()]
+                self.conn.execute("DELETE FROM health_entries WHERE username = ?", (username,))
+                self.conn.executemany(
+                    "INSERT INTO health_entries (username, date, data) VALUES (?, ?, ?)", rows)
+                written += sum(len(row[2]) for row in rows)
+
+            if "bmi_history" in sections:
+                rows = [(username, json.dumps(record)) for record in user.get("bmi_history", [])]
+                self.conn.execute("DELETE FROM bmi_records WHERE username = ?", (username,))
+                self.conn.executemany("INSERT INTO bmi_records (username, data) VALUES (?, ?)", rows)
+                written += sum(len(row[1]) for row in rows)
+        return written
+
+    # Insert or replace one daily health entry
+    def append_health_entry(self, username, date, data):
+        payload = json.dumps(data)
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO health_entries (username, date, data) VALUES (?, ?, ?)",
+                (username, date, payload))
+        return len(payload)
+
+    # Append a BMI record, trimming the user's history to the last 10
+    def append_bmi_record(self, username, record):
+        payload = json.dumps(record)
+        with self._lock, self.conn:
+            self.conn.execute("INSERT INTO bmi_records (username, data) VALUES (?, ?)",
+                              (username, payload))
+            self.conn.execute(
+                "DELETE FROM bmi_records WHERE username = ? AND id NOT IN "
+                "(SELECT id FROM bmi_records WHERE username = ? ORDER BY id DESC LIMIT ?)",
+                (username, username, BMI_HISTORY_LIMIT))
+        return len(payload)
+
+    def query_health_range(self, username, start=None, end=None):
+        sql = "SELECT date, data FROM health_entries WHERE username = ?"
+        params = [username]
+        if start is not None:
+            sql += " AND date >= ?"
+            params.append(start)
+        if end is not None:
+            sql += " AND date <= ?"
+            params.append(end)
+        with self._lock:
+            rows = self.conn.execute(sql + " ORDER BY date", params).fetchall()
+        return {date: json.loads(data) for date, data in rows}
+
+    def query_health_page(self, username, limit, before=None):
+        sql = "SELECT date, data FROM health_entries WHERE username = ?"
+        params = [username]
+        if before is not None:
+            sql += " AND date < ?"
+            params.append(before)
+        with self._lock:
+            rows = self.conn.execute(sql + " ORDER BY date DESC LIMIT ?", params + [limit]).fetchall()
+        return [(date, json.loads(data)) for date, data in rows]
+
+    def compact_all(self):
+        with self._lock:
+            self.conn.execute("VACUUM")
+        return 0
+
+    # Login metadata: one small row, written without touching the user's other tables
+    def load_activity(self, username):
+        with self._lock:
+            row = self.conn.execute("SELECT data FROM activity WHERE username = ?",
+                                    (username,)).fetchone()
+        return json.loads(row[0]) if row else {}
+
+    def save_activity(self, username, activity):
+        payload = json.dumps(activity)
+        with self._lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO activity (username, data) VALUES (?, ?)",
+                              (username, payload))
+        return len(payload)
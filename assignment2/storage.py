@@ -0,0 +1,628 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+from urllib.parse import quote
+from offset_index import OffsetIndex, StaleIndexError
+from snapshot_cache import load_json_cached, write_snapshot
+
+# Per-user sections, each persisted in its own file
+SECTIONS = ("profile", "health_data", "bmi_history")
+
+# Sections whose mutations are appended to the journal instead of rewritten
+JOURNAL_SECTIONS = ("health_data", "bmi_history")
+
+# Number of BMI records kept per user
+BMI_HISTORY_LIMIT = 10
+
+# Journal size (bytes) after which it is folded back into the snapshot files
+COMPACT_THRESHOLD = 64 * 1024
+
+# Fields kept in the account index
+ACCOUNT_FIELDS = ("username", "password_hash", "email")
+
+# Version of the per-user directory naming, recorded in <data_dir>/layout.json
+LAYOUT_VERSION = 2
+
+# Characters of the readable part of a user directory name
+NAME_PREFIX_LENGTH = 40
+
+
+def write_json_atomic(path, data, indent=4, cached=False, mode=None):
+    """Write JSON through a temp file so a crash never leaves a half-written file
+
+    With cached=True a parsed-state snapshot is written alongside it, so the
+    next read_json(path, cached=True) can skip JSON parsing. mode (e.g.
+    0o600) creates the file with those permissions instead of the umask's.
+    """
+    payload = json.dumps(data, indent=indent).encode("utf-8")
+    tmp_path = path + ".tmp"
+    if mode is None:
+        f = open(tmp_path, "wb")
+    else:
+        # A leftover temp file would keep its old permissions
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        f = os.fdopen(os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode), "wb")
+    with f:
+        f.write(payload)
+        # On disk before the rename, or a power cut can leave an empty file
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    if cached:
+        write_snapshot(path, data, payload)
+    return len(payload)
+
+
+def read_json(path, default=None, cached=False):
+    """Read a JSON file, returning default when it does not exist"""
+    if not os.path.exists(path):
+        return default
+    if cached:
+        return load_json_cached(path)
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def legacy_safe_name(username):
+    """Directory name used before LAYOUT_VERSION 2 (collides on case-insensitive filesystems)"""
+    name = quote(username, safe="")
+    if name.startswith("."):
+        name = "%2E" + name[1:]
+    return name
+
+
+def safe_name(username):
+    """Turn a username into a directory name that cannot escape the data directory
+
+    The readable part is lower-cased and a hash of the exact username is
+    appended, so "JIAYIN" and "jiayin" stay apart on case-insensitive
+    filesystems and no name is a reserved Windows device such as "con".
+    """
+    digest = hashlib.blake2b(username.encode("utf-8"), digest_size=5).hexdigest()
+    return f"{legacy_safe_name(username.lower())[:NAME_PREFIX_LENGTH]}-{digest}"
+
+
+def account_record(user):
+    """Extract the index fields of a user record"""
+    return {field: user.get(field, "") for field in ACCOUNT_FIELDS}
+
+
+def wrap_snapshot(data, generation):
+    """Tag a journaled section's snapshot with the journal generation it includes"""
+    return {"journal_generation": generation, "data": data}
+
+
+def unwrap_snapshot(value):
+    """Return (data, generation) of a section file; untagged files predate generations"""
+    if isinstance(value, dict) and set(value) == {"journal_generation", "data"}:
+        return value["data"], value["journal_generation"]
+    return value, -1
+
+
+def apply_journal_entry(user, entry):
+    """Replay one journal entry onto an in-memory user record"""
+    if entry["section"] == "health_data":
+        user.setdefault("health_data", {})[entry["date"]] = entry["data"]
+    elif entry["section"] == "bmi_history":
+        history = user.setdefault("bmi_history", [])
+        history.append(entry["record"])
+        del history[:-BMI_HISTORY_LIMIT]
+
+
+def filter_date_range(health_data, start=None, end=None):
+    """Return the entries with start <= date <= end, in date order"""
+    return {date: health_data[date] for date in sorted(health_data)
+            if (start is None or date >= start) and (end is None or date <= end)}
+
+
+class StorageBackend:
+    """Interface every storage backend implements
+
+    User records are dicts with the account fields (username, password_hash,
+    email) plus "profile", "health_data" and "bmi_history" sections. Write
+    methods return the number of bytes they wrote.
+    """
+
+    def load_accounts(self):
+        """Return {username: account fields} for every user"""
+        raise NotImplementedError
+
+    def save_accounts(self, accounts):
+        """Insert or update the given {username: account fields}"""
+        raise NotImplementedError
+
+    def load_user(self, username, account=None):
+        """Return one full user record, or None if the user does not exist"""
+        raise NotImplementedError
+
+    def save_user(self, username, user, sections=SECTIONS):
+        """Persist the given sections of one user record"""
+        raise NotImplementedError
+
+    def append_health_entry(self, username, date, data):
+        """Insert or replace one daily health entry"""
+        raise NotImplementedError
+
+    def append_bmi_record(self, username, record):
+        """Append a BMI record, keeping the last BMI_HISTORY_LIMIT"""
+        raise NotImplementedError
+
+    def load_activity(self, username):
+        """Return a user's login metadata (last_login, login_count, ...), {} if none"""
+        raise NotImplementedError
+
+    def save_activity(self, username, activity):
+        """Persist one user's login metadata without touching the user record"""
+        raise NotImplementedError
+
+    def load_all(self):
+        accounts = self.load_accounts()
+        return {username: self.load_user(username, account)
+                for username, account in accounts.items()}
+
+    def list_users(self):
+        return list(self.load_accounts())
+
+    def query_health_range(self, username, start=None, end=None):
+        """Return {date: entry} for start <= date <= end (either bound optional)"""
+        user = self.load_user(username)
+        if user is None:
+            return {}
+        return filter_date_range(user["health_data"], start, end)
+
+    def query_health_page(self, username, limit, before=None):
+        """Return up to `limit` (date, entry) pairs newest first, only dates before `before` if given"""
+        user = self.load_user(username)
+        if user is None:
+            return []
+        health_data = user["health_data"]
+        dates = sorted((date for date in health_data if before is None or date < before), reverse=True)
+        return [(date, health_data[date]) for date in dates[:limit]]
+
+    def compact(self, username):
+        return 0
+
+    def compact_all(self):
+        return 0
+
+    def close(self):
+        pass
+
+
+class JSONUserStore(StorageBackend):
+    """Sharded JSON storage: a small account index plus one directory per user
+
+    Layout:
+        users/index.json                  username -> username, password_hash, email
+        users/layout.json                 directory naming version (see safe_name)
+        users/<user>/profile.json
+        users/<user>/health_data.json
+        users/<user>/bmi_history.json
+        users/<user>/journal.jsonl        appended health/BMI entries
+        users/<user>/activity.json        last login, login count (see save_activity)
+        *.json.cache                      parsed snapshots of index.json and health_data.json
+
+    A write only touches the files of the user (and section) that changed,
+    so its cost no longer grows with the number of accounts. Daily logs and
+    BMI records are appended to the user's journal, which is replayed on
+    load and compacted into the section files once it passes
+    compact_threshold bytes.
+
+    The journal starts with a {"generation": n} header and every entry is
+    stamped with the generation it was appended in. Rewriting a journaled
+    section first moves the journal on to the next generation, then tags
+    the section file with the previous one, then drops the entries it now
+    contains. Replay skips entries whose generation the section already
+    includes, so a crash between the steps never applies an entry twice.
+    """
+
+    def __init__(self, data_dir="users", legacy_file="users.json",
+                 compact_threshold=COMPACT_THRESHOLD):
+        self.data_dir = data_dir
+        self.legacy_file = legacy_file
+        self.index_file = os.path.join(data_dir, "index.json")
+        self.layout_file = os.path.join(data_dir, "layout.json")
+        self.compact_threshold = compact_threshold
+        self._lock = threading.RLock()
+        self._compacting = {}  # username -> compaction thread
+
+    def user_dir(self, username):
+        return os.path.join(self.data_dir, safe_name(username))
+
+    def section_file(self, username, section):
+        return os.path.join(self.user_dir(username), f"{section}.json")
+
+    def journal_file(self, username):
+        return os.path.join(self.user_dir(username), "journal.jsonl")
+
+    def activity_file(self, username):
+        return os.path.join(self.user_dir(username), "activity.json")
+
+    # Load account index (migrating the old single users.json on first run)
+    def load_accounts(self):
+        if not os.path.exists(self.index_file):
+            os.makedirs(self.data_dir, exist_ok=True)
+            legacy_users = read_json(self.legacy_file, {}) if self.legacy_file else {}
+            self.migrate(legacy_users)
+            write_json_atomic(self.layout_file, {"version": LAYOUT_VERSION})
+        accounts = read_json(self.index_file, {}, cached=True)
+        if read_json(self.layout_file, {}).get("version", 1) < LAYOUT_VERSION:
+            self._rename_user_dirs(accounts)
+        return accounts
+
+    def _rename_user_dirs(self, accounts):
+        """Move user directories from the legacy names to safe_name()"""
+        with self._lock:
+            for username in accounts:
+                legacy_dir = os.path.join(self.data_dir, legacy_safe_name(username))
+                if os.path.isdir(legacy_dir) and not os.path.exists(self.user_dir(username)):
+                    os.rename(legacy_dir, self.user_dir(username))
+            write_json_atomic(self.layout_file, {"version": LAYOUT_VERSION})
+
+    def migrate(self, users):
+        """Split a {username: user} document into the sharded layout"""
+        for username, user in users.items():
+            self.save_user(username, user)
+        self.save_accounts({username: account_record(user) for username, user in users.items()})
+
+    def save_accounts(self, accounts):
+        with self._lock:
+            os.makedirs(self.data_dir, exist_ok=True)
+            index = read_json(self.index_file, {}, cached=True)
+            index.update({username: account_record(account)
+                          for username, account in accounts.items()})
+            return write_json_atomic(self.index_file, index, cached=True)
+
+    # Load one user's full record
+    def load_user(self, username, account=None):
+        if account is None:
+            account = self.load_accounts().get(username)
+            if account is None:
+                return None
+
+        user = dict(account)
+        with self._lock:
+            user.update(self._load_sections(username))
+        return user
+
+    def _load_sections(self, username):
+        """Read the snapshot files and replay the journal on top of them"""
+        sections = {"profile": read_json(self.section_file(username, "profile"), {})}
+        generations = {}
+        sections["health_data"], generations["health_data"] = unwrap_snapshot(
+            read_json(self.section_file(username, "health_data"), {}, cached=True))
+        sections["bmi_history"], generations["bmi_history"] = unwrap_snapshot(
+            read_json(self.section_file(username, "bmi_history"), []))
+
+        _, entries = self._read_journal(username)
+        for entry in entries:
+            # Skip entries the snapshot already contains
+            if entry.get("generation", 0) > generations[entry["section"]]:
+                apply_journal_entry(sections, entry)
+        return sections
+
+    def _read_journal(self, username):
+        """Return (current generation, entries); journals without a header are generation 0"""
+        path = self.journal_file(username)
+        if not os.path.exists(path):
+            return 0, []
+
+        generation = 0
+        entries = []
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn line from an interrupted append; later lines are intact
+                    continue
+                if "section" in entry:
+                    entries.append(entry)
+                else:
+                    generation = entry["generation"]
+        return generation, entries
+
+    def _journal_generation(self, username):
+        path = self.journal_file(username)
+        if not os.path.exists(path):
+            return 0
+        with open(path, "r") as f:
+            try:
+                header = json.loads(f.readline())
+            except ValueError:
+                return 0
+        return header.get("generation", 0) if "section" not in header else 0
+
+    # Save selected sections of one user
+    def save_user(self, username, user, sections=SECTIONS):
+        with self._lock:
+            os.makedirs(self.user_dir(username), exist_ok=True)
+            generation, entries = self._read_journal(username)
+            journaled = any(section in JOURNAL_SECTIONS for section in sections)
+            written = 0
+            if journaled:
+                # Entries appended from here on must outrank the snapshot
+                written += self._rewrite_journal(username, generation + 1, entries)
+            for section in sections:
+                data = user.get(section, [] if section == "bmi_history" else {})
+                if section in JOURNAL_SECTIONS:
+                    # The record holds every journal entry up to this generation
+                    data = wrap_snapshot(data, generation)
+                # health_data is the one section that grows without bound
+                written += write_json_atomic(self.section_file(username, section), data,
+                                             cached=section == "health_data")
+
+            # Journal entries for rewritten sections are now part of the snapshot
+            if journaled:
+                kept = [entry for entry in entries if entry["section"] not in sections]
+                written += self._rewrite_journal(username, generation + 1, kept)
+            return written
+
+    def _rewrite_journal(self, username, generation, entries):
+        # Kept entries keep their own generation; only the header moves on
+        path = self.journal_file(username)
+        lines = [{"generation": generation}] + entries
+        payload = "".join(json.dumps(entry) + "\n" for entry in lines).encode("utf-8")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        return len(payload)
+
+    # Append a daily health entry to the journal
+    def append_health_entry(self, username, date, data):
+        return self._append(username, {"section": "health_data", "date": date, "data": data})
+
+    # Append a BMI record to the journal
+    def append_bmi_record(self, username, record):
+        return self._append(username, {"section": "bmi_history", "record": record})
+
+    def _append(self, username, entry):
+        with self._lock:
+            os.makedirs(self.user_dir(username), exist_ok=True)
+            entry = dict(entry, generation=self._journal_generation(username))
+            line = (json.dumps(entry) + "\n").encode("utf-8")
+            path = self.journal_file(username)
+            self._trim_torn_line(path)
+            with open(path, "ab") as f:
+                f.write(line)
+                journal_size = f.tell()
+
+            if journal_size > self.compact_threshold and username not in self._compacting:
+                thread = threading.Thread(target=self._background_compact, args=(username,),
+                                          daemon=True)
+                self._compacting[username] = thread
+                thread.start()
+        return len(line)
+
+    @staticmethod
+    def _trim_torn_line(path):
+        """Cut a journal back to its last newline so the next entry starts on a fresh line"""
+        if not os.path.exists(path):
+            return
+        with open(path, "r+b") as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            f.seek(0)
+            f.truncate(f.read().rfind(b"\n") + 1)
+
+    def _background_compact(self, username):
+        try:
+            self.compact(username)
+        finally:
+            with self._lock:
+                self._compacting.pop(username, None)
+
+    def compact(self, username):
+        """Fold a user's journal into the section snapshots and drop it"""
+        with self._lock:
+            if not self._read_journal(username)[1]:
+                return 0
+            sections = self._load_sections(username)
+            return self.save_user(username, sections, JOURNAL_SECTIONS)
+
+    def compact_all(self):
+        return sum(self.compact(username) for username in self.load_accounts())
+
+    def close(self):
+        """Wait for background compactions so none is cut off at exit"""
+        with self._lock:
+            threads = list(self._compacting.values())
+        for thread in threads:
+            thread.join()
+
+    def load_activity(self, username):
+        return read_json(self.activity_file(username), {})
+
+    def save_activity(self, username, activity):
+        with self._lock:
+            os.makedirs(self.user_dir(username), exist_ok=True)
+            return write_json_atomic(self.activity_file(username), activity, indent=None)
+
+
+class MemoryUserStore(StorageBackend):
+    """Keeps every user in a dict; for tests and benchmarks"""
+
+    def __init__(self, users=None):
+        self.users = copy.deepcopy(users) if users else {}
+        self.activity = {}
+        self._lock = threading.RLock()
+
+    def load_accounts(self):
+        with self._lock:
+            return {username: account_record(user) for username, user in self.users.items()}
+
+    def save_accounts(self, accounts):
+        with self._lock:
+            for username, account in accounts.items():
+                user = self.users.setdefault(
+                    username, {"profile": {}, "health_data": {}, "bmi_history": []})
+                user.update(account_record(account))
+            return 0
+
+    def load_user(self, username, account=None):
+        with self._lock:
+            user = self.users.get(username)
+            return copy.deepcopy(user) if user is not None else None
+
+    def save_user(self, username, user, sections=SECTIONS):
+        with self._lock:
+            stored = self.users.setdefault(username, account_record(user))
+            for section in sections:
+                stored[section] = copy.deepcopy(user.get(section, [] if section == "bmi_history" else {}))
+            return 0
+
+    def append_health_entry(self, username, date, data):
+        with self._lock:
+            self.users[username].setdefault("health_data", {})[date] = copy.deepcopy(data)
+            return 0
+
+    def append_bmi_record(self, username, record):
+        with self._lock:
+            apply_journal_entry(self.users[username],
+                                {"section": "bmi_history", "record": copy.deepcopy(record)})
+            return 0
+
+    def load_activity(self, username):
+        with self._lock:
+            return copy.deepcopy(self.activity.get(username, {}))
+
+    def save_activity(self, username, activity):
+        with self._lock:
+            self.activity[username] = copy.deepcopy(activity)
+            return 0
+
+
+class SingleFileJSONStore(StorageBackend):
+    """The original layout: every user in one users.json, rewritten on each save
+
+    A sidecar OffsetIndex (users.json.idx) records where each user's record
+    sits, so single-user reads seek to one record and a rewrite copies the
+    other users' bytes without parsing them. Login metadata lives in a
+    second small sidecar (users.json.activity) so sign-ins never rewrite
+    users.json.
+    """
+
+    def __init__(self, users_file="users.json"):
+        self.users_file = users_file
+        self.activity_file = users_file + ".activity"
+        self.index = OffsetIndex(users_file)
+        self._lock = threading.RLock()
+        if not self.index.load():
+            self.index.rebuild()
+
+    def rebuild_index(self):
+        with self._lock:
+            return self.index.rebuild()
+
+    def load_accounts(self):
+        with self._lock:
+            return {username: dict(entry["account"]) for username, entry in self.index.entries.items()}
+
+    def save_accounts(self, accounts):
+        with self._lock:
+            changed = {}
+            for username, account in accounts.items():
+                user = self.load_user(username)
+                if user is None:
+                    user = dict(account_record(account), profile={}, health_data={}, bmi_history=[])
+                user.update(account_record(account))
+                changed[username] = user
+            return self._rewrite(changed)
+
+    def load_user(self, username, account=None):
+        with self._lock:
+            if username not in self.index.entries:
+                return None
+            try:
+                record = self.index.read_record(username)
+            except StaleIndexError:
+                # The file was changed behind our back
+                self.index.rebuild()
+                if username not in self.index.entries:
+                    return None
+                record = self.index.read_record(username)
+            return json.loads(record.decode("utf-8"))
+
+    def save_user(self, username, user, sections=SECTIONS):
+        with self._lock:
+            stored = self.load_user(username) or account_record(user)
+            for section in sections:
+                stored[section] = user.get(section, [] if section == "bmi_history" else {})
+            return self._rewrite({username: stored})
+
+    def append_health_entry(self, username, date, data):
+        with self._lock:
+            stored = self.load_user(username)
+            stored.setdefault("health_data", {})[date] = data
+            return self._rewrite({username: stored})
+
+    def append_bmi_record(self, username, record):
+        with self._lock:
+            stored = self.load_user(username)
+            apply_journal_entry(stored, {"section": "bmi_history", "record": record})
+            return self._rewrite({username: stored})
+
+    def load_activity(self, username):
+        with self._lock:
+            return read_json(self.activity_file, {}).get(username, {})
+
+    def save_activity(self, username, activity):
+        with self._lock:
+            activities = read_json(self.activity_file, {})
+            activities[username] = activity
+            return write_json_atomic(self.activity_file, activities, indent=None)
+
+    def _rewrite(self, changed):
+        """Rewrite the file with the changed users re-serialized and the rest copied as bytes"""
+        if not self.index.is_current():
+            # Changed behind our back; the stored offsets would copy the wrong bytes
+            self.index.rebuild()
+        data = b""
+        if os.path.exists(self.users_file):
+            with open(self.users_file, "rb") as f:
+                data = f.read()
+
+        records = []
+        for username, entry in self.index.entries.items():
+            if username in changed:
+                records.append((username, changed[username]))
+            else:
+                records.append((username, data[entry["offset"]:entry["offset"] + entry["length"]]))
+        for username, user in changed.items():
+            if username not in self.index.entries:
+                records.append((username, user))
+        return self.index.write(records)
+
+
+# Names accepted by create_store()
+STORAGE_BACKENDS = ("json", "single", "sqlite", "memory")
+
+
+def create_store(backend="json", data_dir="users", legacy_file="users.json"):
+    """Build a storage backend by name
+
+    json    one directory per user plus an account index (default)
+    single  the original single users.json document
+    sqlite  a SQLite database next to data_dir
+    memory  nothing persisted
+    """
+    if backend == "json":
+        return JSONUserStore(data_dir, legacy_file=legacy_file)
+    if backend == "single":
+        return SingleFileJSONStore(legacy_file)
+    if backend == "sqlite":
+        from sqlite_store import SQLiteUserStore
+        return SQLiteUserStore(f"{data_dir}.db", legacy_file=legacy_file)
+    if backend == "memory":
+        return MemoryUserStore()
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,159 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# How often (ms) the Tk thread delivers finished work
+POLL_INTERVAL_MS = 25
+
+# Worker threads for I/O and GIL-releasing work (storage, scrypt, numpy)
+THREAD_WORKERS = 4
+
+THREAD = "thread"
+PROCESS = "process"
+
+
+class TaskCancelled(Exception):
+    """Raised inside a task by its progress callback once it was cancelled"""
+
+
+class Task:
+    """Handle for one submitted call"""
+
+    def __init__(self, executor, name, on_progress=None):
+        self.executor = executor
+        self.name = name
+        self.future = None
+        self._on_progress = on_progress
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Stop the task: it never starts if still queued, a running one
+        stops at its next progress report, and on_done is not called"""
+        self._cancelled.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    # Passed to the task as progress=; runs on the worker
+    def report(self, *args):
+        if self.cancelled():
+            raise TaskCancelled(self.name)
+        self.executor._deliver(self, self._on_progress, args)
+
+
+class TaskExecutor:
+    """Runs slow work off the Tk thread and hands results back to it
+
+    submit() runs func(*args) on a thread lane, or with lane=PROCESS in a
+    separate process (for CPU-bound pure functions; func and arguments must
+    be picklable). Completion callbacks on_done(result, error) and progress
+    callbacks are put on a queue that the Tk thread drains with root.after,
+    so they always run on the UI thread. Callbacks of cancelled tasks are
+    dropped.
+    """
+
+    def __init__(self, root=None, thread_workers=THREAD_WORKERS, process_workers=None):
+        self.root = root
+        self.results = queue.Queue()
+        self._threads = ThreadPoolExecutor(max_workers=thread_workers, thread_name_prefix="task")
+        self._process_workers = process_workers
+        self._processes = None
+        self._lock = threading.Lock()
+        self._stopping = False
+
+    def start(self):
+        if self.root is not None:
+            self.root.after(POLL_INTERVAL_MS, self._poll)
+        return self
+
+    def _process_pool(self):
+        # Started on first use; spawning interpreters is not free
+        with self._lock:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(max_workers=self._process_workers)
+            return self._processes
+
+    def submit(self, func, *args, on_done=None, on_progress=None, lane=THREAD):
+        """Run func(*args) in the background and return its Task
+
+        With on_progress, func is also passed progress=<callable>; every
+        call forwards its arguments to on_progress on the Tk thread and
+        raises TaskCancelled once the task has been cancelled. Progress is
+        only available on the thread lane.
+        """
+        if self._stopping:
+            raise RuntimeError("TaskExecutor has been shut down")
+
+        task = Task(self, getattr(func, "__name__", "task"), on_progress)
+        if lane == PROCESS:
+            if on_progress is not None:
+                raise ValueError("Progress callbacks need the thread lane")
+            task.future = self._process_pool().submit(func, *args)
+        elif lane == THREAD:
+            task.future = self._threads.submit(self._run, task, func, args, on_progress is not None)
+        else:
+            raise ValueError(f"Unknown lane: {lane}")
+
+        if on_done is not None:
+            task.future.add_done_callback(lambda future: self._finished(task, future, on_done))
+        return task
+
+    def _run(self, task, func, args, with_progress):
+        if task.cancelled():
+            raise TaskCancelled(task.name)
+        if with_progress:
+            return func(*args, progress=task.report)
+        return func(*args)
+
+    # Runs on whichever thread finished the future
+    def _finished(self, task, future, on_done):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if isinstance(error, TaskCancelled):
+            return
+        result = None if error is not None else future.result()
+        self._deliver(task, on_done, (result, error))
+
+    def _deliver(self, task, callback, args):
+        self.results.put((task, callback, args))
+        if self.root is None:
+            self.drain()
+
+    def post(self, callback, *args):
+        """Run callback(*args) on the Tk thread; safe to call from any thread"""
+        self._deliver(None, callback, args)
+
+    # Deliver finished work on the Tk thread
+    def _poll(self):
+        self.drain()
+        if not self._stopping:
+            self.root.after(POLL_INTERVAL_MS, self._poll)
+
+    def drain(self):
+        while True:
+            try:
+                task, callback, args = self.results.get_nowait()
+            except queue.Empty:
+                return
+            if task is None or not task.cancelled():
+                callback(*args)
+
+    def shutdown(self, wait=True):
+        """Cancel queued tasks, wait for running ones and drop their callbacks"""
+        self._stopping = True
+        self._threads.shutdown(wait=wait, cancel_futures=True)
+        with self._lock:
+            if self._processes is not None:
+                self._processes.shutdown(wait=wait, cancel_futures=True)
+        # The UI is going away; nothing left on the queue is delivered
+        while True:
+            try:
+                self.results.get_nowait()
+            except queue.Empty:
+                return
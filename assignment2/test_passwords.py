@@ -0,0 +1,116 @@
+"""Password hashing and the login upgrade path
+
+Run with: python -m pytest -q   (or python -m unittest test_passwords)
+"""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+# Cheap scrypt settings; passwords.py reads them at import time
+os.environ.setdefault("HEALTH_APP_SCRYPT_N", "1024")
+
+import passwords
+from auth import AuthenticationSystem
+
+
+class PasswordHashTest(unittest.TestCase):
+    def test_scrypt_round_trip(self):
+        stored = passwords.hash_password("secret1")
+        self.assertTrue(stored.startswith("scrypt$"))
+        self.assertTrue(passwords.verify_password("secret1", stored))
+        self.assertFalse(passwords.verify_password("secret2", stored))
+        self.assertFalse(passwords.needs_rehash(stored))
+
+    def test_hashes_are_salted(self):
+        self.assertNotEqual(passwords.hash_password("secret1"), passwords.hash_password("secret1"))
+
+    def test_legacy_sha256_verifies_and_needs_rehash(self):
+        stored = passwords.legacy_hash("secret1")
+        self.assertTrue(passwords.verify_password("secret1", stored))
+        self.assertFalse(passwords.verify_password("secret2", stored))
+        self.assertTrue(passwords.needs_rehash(stored))
+
+    def test_needs_rehash_when_cost_changes(self):
+        stored = passwords.hash_password("secret1")
+        for name, value in (("SCRYPT_N", passwords.SCRYPT_N * 2), ("SCRYPT_R", passwords.SCRYPT_R + 1),
+                            ("SCRYPT_P", passwords.SCRYPT_P + 1)):
+            with self.subTest(setting=name), mock.patch.object(passwords, name, value):
+                self.assertTrue(passwords.needs_rehash(stored))
+                # The old cost still verifies until the hash is upgraded
+                self.assertTrue(passwords.verify_password("secret1", stored))
+
+    def test_malformed_hashes_are_rejected(self):
+        salt_and_key = passwords.hash_password("secret1").split("$", 4)[4]
+        malformed = [
+            "",
+            "scrypt$1024$8",
+            "bcrypt$1024$8$1$" + salt_and_key,
+            "scrypt$abc$8$1$" + salt_and_key,
+            "scrypt$1000$8$1$" + salt_and_key,
+            "scrypt$1024$0$1$" + salt_and_key,
+            "scrypt$1024$8$1$not base64!$" + salt_and_key.split("$")[1],
+        ]
+        for stored in malformed:
+            with self.subTest(stored=stored):
+                self.assertFalse(passwords.verify_password("secret1", stored))
+                self.assertTrue(passwords.needs_rehash(stored))
+
+
+class LoginUpgradeTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def open_auth(self):
+        return AuthenticationSystem(os.path.join(self._tmp.name, "users"),
+                                    os.path.join(self._tmp.name, "users.json"))
+
+    def set_hash(self, auth, username, stored):
+        auth.accounts[username]["password_hash"] = stored
+        auth.users[username]["password_hash"] = stored
+        auth._dirty_accounts.add(username)
+        auth.flush()
+
+    def stored_hash(self, username):
+        auth = self.open_auth()
+        try:
+            return auth.accounts[username]["password_hash"]
+        finally:
+            auth.close()
+
+    def test_legacy_hash_is_upgraded_on_login(self):
+        auth = self.open_auth()
+        auth.register("alice", "secret1")
+        self.set_hash(auth, "alice", passwords.legacy_hash("secret1"))
+
+        self.assertFalse(auth.login("alice", "wrong")[0])
+        self.assertTrue(passwords.is_legacy(auth.accounts["alice"]["password_hash"]))
+        self.assertTrue(auth.login("alice", "secret1")[0])
+        auth.close()
+
+        upgraded = self.stored_hash("alice")
+        self.assertTrue(upgraded.startswith("scrypt$"))
+        self.assertTrue(passwords.verify_password("secret1", upgraded))
+
+    def test_hash_with_old_cost_is_upgraded_on_login(self):
+        auth = self.open_auth()
+        auth.register("alice", "secret1")
+        self.set_hash(auth, "alice", passwords.hash_password("secret1", n=passwords.SCRYPT_N // 2))
+
+        self.assertTrue(auth.login("alice", "secret1")[0])
+        auth.close()
+        self.assertFalse(passwords.needs_rehash(self.stored_hash("alice")))
+
+    def test_malformed_hash_refuses_login(self):
+        auth = self.open_auth()
+        auth.register("alice", "secret1")
+        self.set_hash(auth, "alice", "scrypt$1024$8$1$garbage")
+
+        self.assertEqual(auth.login("alice", "secret1"), (False, "Incorrect password!"))
+        self.assertIsNone(auth.current_user)
+        auth.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+"""Remember-me sessions: expiry, revocation and the files behind them
+
+Run with: python -m pytest -q   (or python -m unittest test_sessions)
+"""
+import json
+import os
+import stat
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+# Cheap scrypt settings; passwords.py reads them at import time
+os.environ.setdefault("HEALTH_APP_SCRYPT_N", "1024")
+
+from auth import AuthenticationSystem
+from sessions import SessionStore, PRIVATE_FILE_MODE, token_hash
+
+
+class SessionStoreTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.store = self.open_store()
+
+    def open_store(self, lifetime=60):
+        return SessionStore(os.path.join(self._tmp.name, "sessions.json"),
+                            os.path.join(self._tmp.name, "remember.json"), lifetime=lifetime)
+
+    def test_create_validate_restore(self):
+        token = self.store.create("alice")
+        self.assertEqual(self.store.validate(token), "alice")
+        self.assertEqual(self.open_store().restore(), "alice")
+        self.assertIsNone(self.store.validate("not a token"))
+
+    def test_only_token_hashes_are_stored(self):
+        token = self.store.create("alice")
+        with open(self.store.sessions_file) as f:
+            self.assertEqual(list(json.load(f)), [token_hash(token)])
+
+    def test_sessions_expire(self):
+        token = self.store.create("alice")
+        later = time.time() + 61
+        with mock.patch("time.time", return_value=later):
+            self.assertIsNone(self.store.validate(token))
+            self.assertIsNone(self.store.restore())
+        # An expired restore also forgets the token file
+        self.assertFalse(os.path.exists(self.store.token_file))
+
+    def test_revoke(self):
+        first = self.store.create("alice")
+        second = self.store.create("alice")
+        self.store.revoke(first)
+        self.assertIsNone(self.store.validate(first))
+        self.assertEqual(self.store.validate(second), "alice")
+
+    def test_revoke_user(self):
+        bob = self.store.create("bob")
+        # alice is the one remembered on this machine
+        alice = [self.store.create("alice") for _ in range(2)]
+        self.store.revoke_user("alice")
+        for token in alice:
+            self.assertIsNone(self.store.validate(token))
+        self.assertEqual(self.store.validate(bob), "bob")
+        self.assertIsNone(self.store.restore())
+
+    def test_restore_rejects_mismatched_username(self):
+        token = self.store.create("alice")
+        with open(self.store.token_file, "w") as f:
+            json.dump({"username": "mallory", "token": token}, f)
+
+        self.assertIsNone(self.store.restore())
+        self.assertFalse(os.path.exists(self.store.token_file))
+        self.assertIsNone(self.store.validate(token))
+
+    def test_forget(self):
+        token = self.store.create("alice")
+        self.store.forget()
+        self.assertIsNone(self.store.validate(token))
+        self.assertIsNone(self.store.restore())
+        self.assertFalse(os.path.exists(self.store.token_file))
+
+    def test_damaged_files_cost_only_the_sign_in(self):
+        self.store.create("alice")
+        with open(self.store.sessions_file, "w") as f:
+            f.write("{not json")
+        self.assertIsNone(self.store.restore())
+
+    @unittest.skipIf(os.name == "nt", "POSIX file modes")
+    def test_files_are_private(self):
+        old_umask = os.umask(0o022)
+        try:
+            self.store.create("alice")
+            self.store.create("bob")
+        finally:
+            os.umask(old_umask)
+        for path in (self.store.sessions_file, self.store.token_file):
+            with self.subTest(path=os.path.basename(path)):
+                self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), PRIVATE_FILE_MODE)
+
+
+class RememberedLoginTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.data_dir = os.path.join(self._tmp.name, "users")
+
+    def open_auth(self):
+        return AuthenticationSystem(self.data_dir, os.path.join(self._tmp.name, "users.json"))
+
+    def test_session_files_live_in_the_data_dir(self):
+        auth = self.open_auth()
+        self.assertEqual(os.path.dirname(auth.sessions.sessions_file), self.data_dir)
+        self.assertEqual(os.path.dirname(auth.sessions.token_file), self.data_dir)
+        auth.close()
+
+    def test_remembered_sign_in_until_logout(self):
+        auth = self.open_auth()
+        auth.register("alice", "secret1")
+        self.assertTrue(auth.login("alice", "secret1", remember=True)[0])
+        auth.close()
+
+        auth = self.open_auth()
+        self.assertEqual(auth.restore_session(), "alice")
+        self.assertEqual(auth.current_user, "alice")
+        auth.logout()
+        auth.close()
+
+        auth = self.open_auth()
+        self.assertIsNone(auth.restore_session())
+        self.assertIsNone(auth.current_user)
+        auth.close()
+
+    def test_login_without_remember_is_not_restored(self):
+        auth = self.open_auth()
+        auth.register("alice", "secret1")
+        auth.login("alice", "secret1")
+        auth.close()
+
+        auth = self.open_auth()
+        self.assertIsNone(auth.restore_session())
+        auth.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
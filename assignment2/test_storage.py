@@ -0,0 +1,253 @@
+"""Round-trip and consistency checks for the storage layer
+
+Run with: python -m pytest -q   (or python -m unittest test_storage)
+"""
+import json
+import os
+import random
+import tempfile
+import unittest
+from datetime import date as Date, timedelta
+
+# Cheap scrypt settings; passwords.py reads them at import time
+os.environ.setdefault("HEALTH_APP_SCRYPT_N", "1024")
+
+from auth import AuthenticationSystem
+from storage import STORAGE_BACKENDS, JSONUserStore, SingleFileJSONStore
+from offset_index import OffsetIndex
+from date_index import DateIndex
+from aggregates import HealthAggregates, METRICS, WINDOWS, entry_values
+
+
+def make_entry(day):
+    return {"sleep": 5 + day % 5, "water": day % 11, "mood": 1 + day % 5,
+            "meals": f"meal {day}", "reflection": "", "timestamp": ""}
+
+
+def day_string(day):
+    return (Date(2023, 1, 1) + timedelta(days=day)).isoformat()
+
+
+class BackendRoundTripTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def open_auth(self, backend):
+        # Each backend gets its own directory
+        root = os.path.join(self._tmp.name, backend)
+        os.makedirs(root, exist_ok=True)
+        return AuthenticationSystem(os.path.join(root, "users"), os.path.join(root, "users.json"),
+                                    backend=backend)
+
+    def test_register_add_flush_reload(self):
+        for backend in STORAGE_BACKENDS:
+            with self.subTest(backend=backend):
+                auth = self.open_auth(backend)
+                self.assertEqual(auth.register("Alice", "secret1", "a@example.com")[0], True)
+                self.assertEqual(auth.login("Alice", "secret1")[0], True)
+                for day in range(20):
+                    auth.add_health_data(day_string(day), make_entry(day))
+                auth.add_health_data(day_string(3), make_entry(99))
+                auth.add_bmi_record({"bmi": 22.5})
+                auth.update_user_profile({"age": 30})
+                auth.flush()
+
+                expected = dict(auth.get_user_health_data())
+                auth.logout()
+                self.assertTrue(auth.evict_user("Alice"))
+                self.assertEqual(auth.get_user_health_data("Alice"), expected)
+                self.assertEqual(auth.get_user_profile("Alice")["age"], 30)
+                self.assertEqual(auth.get_user_bmi_history("Alice")[-1]["bmi"], 22.5)
+                auth.close()
+
+                if backend == "memory":
+                    continue
+                reloaded = self.open_auth(backend)
+                self.assertEqual(reloaded.login("Alice", "secret1")[0], True)
+                self.assertEqual(reloaded.get_user_health_data(), expected)
+                self.assertEqual(reloaded.get_activity()["login_count"], 2)
+                reloaded.close()
+
+    def test_usernames_differing_in_case_stay_apart(self):
+        auth = self.open_auth("json")
+        auth.register("JIAYIN", "secret1")
+        auth.register("jiayin", "secret2")
+        auth.add_health_data(day_string(0), make_entry(0), username="JIAYIN")
+        auth.close()
+
+        store = JSONUserStore(os.path.join(self._tmp.name, "json", "users"), legacy_file=None)
+        self.assertNotEqual(store.user_dir("JIAYIN").lower(), store.user_dir("jiayin").lower())
+        self.assertEqual(store.load_user("jiayin")["health_data"], {})
+
+
+class JournalTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.data_dir = os.path.join(self._tmp.name, "users")
+        self.store = self.open_store()
+        self.store.save_accounts({"bob": {"username": "bob", "password_hash": "x", "email": ""}})
+        self.store.save_user("bob", {"profile": {}, "health_data": {}, "bmi_history": []})
+
+    def open_store(self):
+        # A high threshold keeps compaction out of the background
+        return JSONUserStore(self.data_dir, legacy_file=None, compact_threshold=1 << 30)
+
+    def test_replay_and_compact(self):
+        for day in range(5):
+            self.store.append_health_entry("bob", day_string(day), make_entry(day))
+        for i in range(12):
+            self.store.append_bmi_record("bob", {"bmi": i})
+
+        before = self.open_store().load_user("bob")
+        self.assertEqual(len(before["health_data"]), 5)
+        self.assertEqual([r["bmi"] for r in before["bmi_history"]], list(range(2, 12)))
+
+        self.store.compact("bob")
+        with open(self.store.journal_file("bob")) as f:
+            self.assertEqual([json.loads(line) for line in f], [{"generation": 2}])
+        after = self.open_store().load_user("bob")
+        self.assertEqual(after, before)
+
+    def test_interrupted_rewrite_applies_entries_once(self):
+        for i in range(3):
+            self.store.append_bmi_record("bob", {"bmi": i})
+
+        # Die after the section files are written, before the journal is trimmed
+        rewrite = self.store._rewrite_journal
+        calls = []
+
+        def interrupted(*args):
+            calls.append(args)
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            return rewrite(*args)
+
+        self.store._rewrite_journal = interrupted
+        with self.assertRaises(KeyboardInterrupt):
+            self.store.compact("bob")
+
+        store = self.open_store()
+        self.assertEqual([r["bmi"] for r in store.load_user("bob")["bmi_history"]], [0, 1, 2])
+        store.append_bmi_record("bob", {"bmi": 3})
+        self.assertEqual([r["bmi"] for r in store.load_user("bob")["bmi_history"]], [0, 1, 2, 3])
+
+    def test_appends_after_torn_line_survive_compaction(self):
+        self.store.append_health_entry("bob", day_string(0), make_entry(0))
+        # An append cut off mid-line by a crash
+        with open(self.store.journal_file("bob"), "ab") as f:
+            f.write(b'{"section": "health_data", "date": "2023-')
+        self.store.append_health_entry("bob", day_string(1), make_entry(1))
+        self.store.append_health_entry("bob", day_string(2), make_entry(2))
+
+        expected = {day_string(day): make_entry(day) for day in range(3)}
+        self.assertEqual(self.open_store().load_user("bob")["health_data"], expected)
+        self.store.compact("bob")
+        self.assertEqual(self.open_store().load_user("bob")["health_data"], expected)
+
+
+class OffsetIndexTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.users_file = os.path.join(self._tmp.name, "users.json")
+        self.users = {
+            name: {"username": name, "password_hash": "x", "email": "",
+                   "profile": {"name": name}, "health_data": {day_string(i): make_entry(i) for i in range(n)},
+                   "bmi_history": []}
+            for name, n in (("ann", 3), ("ben", 10), ("cat", 1))
+        }
+        store = SingleFileJSONStore(self.users_file)
+        store.save_accounts(self.users)
+        for name, user in self.users.items():
+            store.save_user(name, user)
+        self.store = store
+
+    def rewrite_behind_our_back(self):
+        # Different formatting moves every record
+        with open(self.users_file, "w") as f:
+            json.dump(self.users, f, indent=1)
+
+    def test_stale_index_is_rebuilt_on_read(self):
+        self.rewrite_behind_our_back()
+        for name, user in self.users.items():
+            self.assertEqual(self.store.load_user(name), user)
+
+    def test_stale_index_is_rejected_on_load(self):
+        self.rewrite_behind_our_back()
+        self.assertFalse(OffsetIndex(self.users_file).load())
+        store = SingleFileJSONStore(self.users_file)
+        self.assertEqual(sorted(store.load_accounts()), sorted(self.users))
+        self.assertEqual(store.load_user("ben"), self.users["ben"])
+
+    def test_write_after_outside_change(self):
+        # Another process grows the last record; earlier offsets stay valid
+        self.users["cat"]["health_data"].update({day_string(i): make_entry(i) for i in range(50)})
+        with open(self.users_file, "w") as f:
+            json.dump(self.users, f, indent=4)
+
+        self.store.append_health_entry("ben", day_string(60), make_entry(60))
+        self.users["ben"]["health_data"][day_string(60)] = make_entry(60)
+        with open(self.users_file) as f:
+            self.assertEqual(json.load(f), self.users)
+        self.assertEqual(SingleFileJSONStore(self.users_file).load_user("cat"), self.users["cat"])
+
+
+class DerivedDataTest(unittest.TestCase):
+    def random_updates(self, seed, count=400):
+        rng = random.Random(seed)
+        for _ in range(count):
+            day = rng.randrange(200)
+            entry = {"sleep": rng.uniform(3, 11), "water": rng.randrange(15), "mood": rng.randint(1, 5)}
+            yield day_string(day), entry
+
+    def test_date_index_matches_sorting(self):
+        index = DateIndex()
+        dates = set()
+        for date, _ in self.random_updates(1):
+            index.add(date)
+            dates.add(date)
+        ordered = sorted(dates)
+
+        self.assertEqual(list(index), ordered)
+        self.assertEqual(index.newest_first(), ordered[::-1])
+        self.assertEqual(index.latest(7), ordered[::-1][:7])
+        pivot = day_string(100)
+        self.assertEqual(index.before(pivot, 5), [d for d in ordered if d < pivot][::-1][:5])
+        self.assertEqual(index.after(pivot, 5), [d for d in ordered if d > pivot][:5])
+        self.assertEqual(index.between(day_string(20), day_string(40)),
+                         [d for d in ordered if day_string(20) <= d <= day_string(40)])
+
+    def test_aggregates_match_brute_force(self):
+        health_data = {}
+        index = DateIndex()
+        aggregates = HealthAggregates(health_data, index)
+        for step, (date, entry) in enumerate(self.random_updates(2)):
+            previous = health_data.get(date)
+            health_data[date] = entry
+            index.add(date)
+            aggregates.add(date, entry, previous)
+            if step % 25:
+                continue
+
+            ordered = sorted(health_data)
+            for n in WINDOWS:
+                recent = [entry_values(health_data[d]) for d in ordered[-n:]]
+                window = aggregates.window(n)
+                self.assertEqual(window["days"], len(recent))
+                for i, metric in enumerate(METRICS):
+                    self.assertAlmostEqual(window[metric], sum(v[i] for v in recent) / len(recent))
+
+            values = [entry_values(health_data[d]) for d in ordered]
+            lifetime = aggregates.lifetime()
+            self.assertEqual(lifetime["days"], len(values))
+            for i, metric in enumerate(METRICS):
+                column = [v[i] for v in values]
+                self.assertAlmostEqual(lifetime[metric]["total"], sum(column))
+                self.assertEqual(lifetime[metric]["min"], min(column))
+                self.assertEqual(lifetime[metric]["max"], max(column))
+
+
+if __name__ == "__main__":
+    unittest.main()
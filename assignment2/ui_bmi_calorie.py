@@ -1,45 +1,11 @@
 import tkinter as tk
 from tkinter import scrolledtext, messagebox, ttk
 import datetime
+import health_calc
 
 def on_mousewheel(event, canvas):
     canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
 
-def get_bmi_category_info(bmi):
-    """Return classification information based on BMI value"""
-    if bmi < 18.5:
-        return {
-            "category": "Underweight",
-            "color": "#4FC3F7",
-            "emoji": "💙",
-            "message": "You may need to gain some weight",
-            "advice": "• Increase calorie intake\n• Include protein-rich foods\n• Consider strength training"
-        }
-    elif bmi < 25:
-        return {
-            "category": "Normal",
-            "color": "#81C784",
-            "emoji": "✅",
-            "message": "Great! You're at a healthy weight",
-            "advice": "• Maintain balanced diet\n• Regular exercise\n• Stay hydrated"
-        }
-    elif bmi < 30:
-        return {
-            "category": "Overweight",
-            "color": "#FFB74D",
-            "emoji": "⚠️",
-            "message": "Consider losing some weight",
-            "advice": "• Reduce processed foods\n• Increase physical activity\n• Portion control"
-        }
-    else:
-        return {
-            "category": "Obese",
-            "color": "#E57373",
-            "emoji": "❗",
-            "message": "Weight loss is recommended",
-            "advice": "• Consult healthcare provider\n• Start gradual weight loss\n• Focus on whole foods"
-        }
-
 # ============ BMI Calculator Functions ============
 def load_profile_data(app, height_entry, weight_entry):
     """Load BMI data from user profile"""
@@ -152,12 +118,10 @@ def calculate_bmi(app):
             return
             
         
-        # Calculate BMI
-        height_m = height / 100
-        bmi = weight / (height_m * height_m)
-        
-        # Get classification information
-        bmi_info = get_bmi_category_info(bmi)
+        # Calculate BMI, classification and ideal weight range
+        report = health_calc.bmi_report(height, weight)
+        bmi = report["bmi"]
+        bmi_info = report["info"]
         
         # Update emoji display
         if hasattr(app, 'bmi_emoji_label'):
@@ -190,9 +154,8 @@ def calculate_bmi(app):
             app.bmi_details_text.insert("end", f"• BMI: {bmi:.1f}\n")
             app.bmi_details_text.insert("end", f"• Status: {bmi_info['message']}\n\n")
             
-            # Calculate ideal weight range
-            min_weight = 18.5 * (height_m * height_m)
-            max_weight = 24.9 * (height_m * height_m)
+            # Ideal weight range
+            min_weight, max_weight = report["min_weight"], report["max_weight"]
             
             app.bmi_details_text.insert("end", f"🎯 Ideal Weight Range:\n")
             app.bmi_details_text.insert("end", f"• Minimum: {min_weight:.1f} kg\n")
@@ -304,30 +267,9 @@ def calculate_calories_func(app):
             height = height if height else 170
             weight = weight if weight else 65
         
-        # Calculate BMR (Basal Metabolic Rate)
-        if gender == "male":
-            bmr = 10 * weight + 6.25 * height - 5 * age + 5
-        else:
-            bmr = 10 * weight + 6.25 * height - 5 * age - 161
-        
-        # Activity level multipliers
-        activity_multipliers = {
-            "sedentary": 1.2,
-            "light": 1.375,
-            "moderate": 1.55,
-            "active": 1.725,
-            "very_active": 1.9
-        }
-        
-        tdee = bmr * activity_multipliers.get(activity, 1.55)
-        
-        # Adjust calories based on goal
-        if goal == "lose":
-            target_calories = tdee - 500
-        elif goal == "gain":
-            target_calories = tdee + 500
-        else:
-            target_calories = tdee
+        # BMR (Mifflin-St Jeor), TDEE for the activity level and goal-adjusted target
+        plan = health_calc.calorie_plan(age, gender, height, weight, activity, goal)
+        bmr, tdee, target_calories = plan["bmr"], plan["tdee"], plan["target"]
         
         # Update calorie value display
         if hasattr(app, 'calorie_value_label'):
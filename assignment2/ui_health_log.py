@@ -428,33 +428,40 @@ def save_daily_log(app):
             "timestamp": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
         
-        # Use auth system to save data
+        # Use auth system to save data; this only updates memory (in order,
+        # on the Tk thread) and the PersistenceWorker writes it to disk
         success = app.add_health_data(date, health_data)
         
         if success:
-            # Show success message
-            mood_emojis = ["😢", "😕", "😐", "😊", "😄"]
-            mood_emoji = mood_emojis[app.mood_var.get() - 1] if 1 <= app.mood_var.get() <= 5 else "😐"
+            show_saved_message(health_data)
+        else:
+            messagebox.showerror("❌ Error", "Failed to save log!")
             
-            success_msg = f"""✅ Successfully saved today's log!
+    except ValueError:
+        messagebox.showerror("❌ Error", "Please enter valid numbers for sleep and water!")
+    except Exception as e:
+        messagebox.showerror("❌ Error", f"An error occurred: {str(e)}")
+
+def show_saved_message(health_data):
+    """Confirm a saved daily log"""
+    sleep, water, mood = health_data["sleep"], health_data["water"], health_data["mood"]
+    meals, reflection = health_data["meals"], health_data["reflection"]
+    
+    mood_emojis = ["😢", "😕", "😐", "😊", "😄"]
+    mood_emoji = mood_emojis[mood - 1] if 1 <= mood <= 5 else "😐"
+    
+    success_msg = f"""✅ Successfully saved today's log!
 
 📊 Summary:
 • Sleep: {sleep} hours
 • Water: {water} cups
-• Mood: {mood_emoji} ({app.mood_var.get()}/5)
+• Mood: {mood_emoji} ({mood}/5)
 • Meals recorded: {len(meals.split('\\n')) if meals else 0} items
 • Reflection: {'✓' if reflection else '✗'}
 
 Keep up the great work! 💪"""
-            
-            messagebox.showinfo("✅ Log Saved", success_msg)
-        else:
-            messagebox.showerror("❌ Error", "Failed to save log!")
-            
-    except ValueError:
-        messagebox.showerror("❌ Error", "Please enter valid numbers for sleep and water!")
-    except Exception as e:
-        messagebox.showerror("❌ Error", f"An error occurred: {str(e)}")
+    
+    messagebox.showinfo("✅ Log Saved", success_msg)
 
 def load_today_data(app):
     """Load today's data"""
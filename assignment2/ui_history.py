@@ -2,6 +2,156 @@ import tkinter as tk
 from tkinter import scrolledtext, messagebox
 import datetime
 
+# Height in pixels of one date row (button plus weekday line)
+ROW_HEIGHT = 64
+
+# Rows scrolled per mouse wheel notch
+WHEEL_ROWS = 1
+
+class VirtualDateList:
+    """Scrolling list of logged dates that only creates widgets for the rows
+    on screen
+
+    A pool of row widgets just big enough to fill the visible area is
+    re-labelled as the list scrolls, so the widget count does not grow with
+    the history. Selecting a date recolours only the old and new rows.
+    on_select(index) is called with the index into dates.
+    """
+    
+    def __init__(self, parent, colors, dates, health_data, on_select):
+        self.colors = colors
+        self.dates = dates
+        self.health_data = health_data
+        self.on_select = on_select
+        self.top = 0  # Scroll offset in pixels
+        self.height = 0
+        self.selected = None
+        self.rows = []
+        self._shown = {}  # Index of each visible date -> its row
+        
+        self.frame = tk.Frame(parent, bg=colors['card_bg'])
+        self.rows_frame = tk.Frame(self.frame, bg=colors['card_bg'])
+        self.scrollbar = tk.Scrollbar(self.frame, orient="vertical", command=self.yview)
+        self.rows_frame.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        
+        self.rows_frame.bind("<Configure>", self._on_resize)
+        self.rows_frame.bind_all("<MouseWheel>", self._on_mousewheel)
+        self.rows_frame.bind_all("<Button-4>", lambda e: self._scroll_rows(-WHEEL_ROWS))
+        self.rows_frame.bind_all("<Button-5>", lambda e: self._scroll_rows(WHEEL_ROWS))
+    
+    def _create_row(self):
+        row_frame = tk.Frame(self.rows_frame, bg=self.colors['card_bg'])
+        button = tk.Button(row_frame,
+                           bg=self.colors['light_card'], fg='white',
+                           font=("Arial", 11),
+                           padx=15, pady=10,
+                           anchor='w',
+                           relief='flat',
+                           cursor="hand2")
+        button.pack(fill='x')
+        weekday_label = tk.Label(row_frame,
+                                 font=("Arial", 9),
+                                 bg=self.colors['light_card'],
+                                 fg='#8b9bb4',
+                                 padx=15)
+        weekday_label.pack(fill='x', pady=(0, 5))
+        
+        row = {'frame': row_frame, 'button': button, 'weekday': weekday_label,
+               'index': None, 'selected': False}
+        button.config(command=lambda: self.select(row['index']))
+        return row
+    
+    # Show the date at index in a recycled row
+    def _bind_row(self, row, index):
+        date_str = self.dates[index]
+        try:
+            date_obj = datetime.datetime.strptime(date_str, "%Y-%m-%d")
+            display_date = date_obj.strftime("%b %d, %Y")
+            weekday = date_obj.strftime("%A")
+        except ValueError:
+            display_date = date_str
+            weekday = ""
+        
+        data = self.health_data.get(date_str, {})
+        complete = all(key in data for key in ('sleep', 'water', 'mood'))
+        icon = "✅" if complete else "📝"
+        
+        row['button'].config(text=f"{icon} {display_date}")
+        row['weekday'].config(text=weekday)
+        row['index'] = index
+    
+    def _style_row(self, row, selected):
+        if row['selected'] == selected:
+            return
+        bg = '#3a86ff' if selected else self.colors['light_card']
+        row['button'].config(bg=bg, font=("Arial", 11, "bold") if selected else ("Arial", 11))
+        row['weekday'].config(bg=bg)
+        row['selected'] = selected
+    
+    def _on_resize(self, event):
+        self.height = event.height
+        needed = event.height // ROW_HEIGHT + 2
+        while len(self.rows) < needed:
+            self.rows.append(self._create_row())
+        self._scroll_to(self.top)
+    
+    def _max_top(self):
+        return max(len(self.dates) * ROW_HEIGHT - self.height, 0)
+    
+    def _scroll_to(self, top):
+        self.top = min(max(int(top), 0), self._max_top())
+        self._render()
+        
+        total = len(self.dates) * ROW_HEIGHT
+        if total <= self.height:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.top / total, (self.top + self.height) / total)
+    
+    def _render(self):
+        first, shift = divmod(self.top, ROW_HEIGHT)
+        self._shown = {}
+        for slot, row in enumerate(self.rows):
+            index = first + slot
+            y = slot * ROW_HEIGHT - shift
+            if index >= len(self.dates) or y >= self.height:
+                row['frame'].place_forget()
+                continue
+            if row['index'] != index:
+                self._bind_row(row, index)
+            self._style_row(row, index == self.selected)
+            row['frame'].place(x=0, y=y + 2, relwidth=1, height=ROW_HEIGHT - 4)
+            self._shown[index] = row
+    
+    # Scrollbar command: ("moveto", fraction) or ("scroll", n, "units"/"pages")
+    def yview(self, *args):
+        if args[0] == "moveto":
+            self._scroll_to(float(args[1]) * len(self.dates) * ROW_HEIGHT)
+        elif args[0] == "scroll":
+            if args[2] == "pages":
+                self._scroll_to(self.top + int(args[1]) * max(self.height - ROW_HEIGHT, ROW_HEIGHT))
+            else:
+                self._scroll_rows(int(args[1]))
+    
+    def _scroll_rows(self, rows):
+        if self.frame.winfo_exists():
+            self._scroll_to(self.top + rows * ROW_HEIGHT)
+    
+    def _on_mousewheel(self, event):
+        self._scroll_rows(int(-1 * (event.delta / 120)) * WHEEL_ROWS)
+    
+    def select(self, index):
+        """Select the date at index; only the old and new rows are restyled"""
+        previous = self._shown.get(self.selected)
+        if previous is not None:
+            self._style_row(previous, False)
+        self.selected = index
+        row = self._shown.get(index)
+        if row is not None:
+            self._style_row(row, True)
+        self.on_select(index)
+
 def view_health_history(app):
     """Display health history records"""
     if not app.auth.is_logged_in():
@@ -51,7 +201,7 @@ def view_health_history(app):
     
     print(f"DEBUG [History]: User: {current_user}")
     print(f"DEBUG [History]: Health data type: {type(health_data)}")
-    print(f"DEBUG [History]: Health data: {health_data}")
+    print(f"DEBUG [History]: Health data: {len(health_data)} records")
     
     # If no records exist
     if not health_data:
@@ -74,9 +224,9 @@ def view_health_history(app):
         start_btn.pack()
         return
 
-    # Sort dates (newest to oldest)
-    sorted_dates = sorted(health_data.keys(), reverse=True)
-    print(f"DEBUG [History]: Sorted dates: {sorted_dates}")
+    # Dates newest to oldest, from the user's sorted date index
+    sorted_dates = app.auth.get_sorted_dates()
+    print(f"DEBUG [History]: Sorted dates: {len(sorted_dates)} dates")
     
     # ============ Statistics Card ============
     stats_card = tk.Frame(content_frame, bg=colors['card_bg'],
@@ -89,31 +239,19 @@ def view_health_history(app):
     
     # Calculate statistics
     total_days = len(health_data)
-    recent_days = min(7, total_days)
-    
-    # Get last 7 days data
-    recent_dates = sorted_dates[:recent_days]
-    recent_data = [health_data[date] for date in recent_dates]
-    
-    # Calculate averages
-    if recent_data:
-        avg_sleep = sum(float(d.get('sleep', 0)) for d in recent_data) / len(recent_data)
-        avg_water = sum(float(d.get('water', 0)) for d in recent_data) / len(recent_data)
-        avg_mood = sum(float(d.get('mood', 0)) for d in recent_data) / len(recent_data)
-    else:
-        avg_sleep = avg_water = avg_mood = 0
     
     # Statistics display
     stats_grid = tk.Frame(stats_card, bg=colors['card_bg'])
     stats_grid.pack(fill='x')
     
-    # Create statistic items
+    # Create statistic items; the averages are filled in once computed
     stats_items = [
         ("📅", "Total Days", f"{total_days} days"),
-        ("📊", "7-Day Avg Sleep", f"{avg_sleep:.1f} hours"),
-        ("💧", "7-Day Avg Water", f"{avg_water:.1f} cups"),
-        ("😊", "7-Day Avg Mood", f"{avg_mood:.1f}/5")
+        ("📊", "7-Day Avg Sleep", "--"),
+        ("💧", "7-Day Avg Water", "--"),
+        ("😊", "7-Day Avg Mood", "--")
     ]
+    value_labels = []
     
     for i, (icon, label, value) in enumerate(stats_items):
         stat_frame = tk.Frame(stats_grid, bg=colors['card_bg'])
@@ -128,9 +266,25 @@ def view_health_history(app):
                 font=("Arial", 11),
                 bg=colors['card_bg'], fg='#8b9bb4').pack()
         
-        tk.Label(stat_frame, text=value,
-                font=("Arial", 16, "bold"),
-                bg=colors['card_bg'], fg='white').pack()
+        value_label = tk.Label(stat_frame, text=value,
+                              font=("Arial", 16, "bold"),
+                              bg=colors['card_bg'], fg='white')
+        value_label.pack()
+        value_labels.append(value_label)
+    
+    # Averages are shared with the Reports screen (see health_stats.HealthStats)
+    # and computed on the task executor
+    def show_averages(stats, error):
+        if error is not None:
+            messagebox.showerror("❌ Error", f"Could not calculate your statistics:\n{error}")
+            return
+        value_labels[1].config(text=f"{stats['avg_sleep']:.1f} hours")
+        value_labels[2].config(text=f"{stats['avg_water']:.1f} cups")
+        value_labels[3].config(text=f"{stats['avg_mood']:.1f}/5")
+    
+    stats_task = app.tasks.submit(app.stats.summary, on_done=show_averages)
+    # Leaving the screen drops the result
+    stats_card.bind("<Destroy>", lambda e: stats_task.cancel())
 
     # ============ History Records List ============
     history_frame = tk.Frame(content_frame, bg=colors['dark_bg'])
@@ -156,92 +310,10 @@ def view_health_history(app):
              font=("Arial", 16, "bold"),
              bg=colors['card_bg'], fg='white').pack(anchor='w', pady=(0, 15))
     
-    # Create date list frame
-    dates_list_frame = tk.Frame(dates_card, bg=colors['card_bg'])
-    dates_list_frame.pack(fill='both', expand=True)
-    
-    # Add scrollbar
-    dates_canvas = tk.Canvas(dates_list_frame, bg=colors['card_bg'], 
-                           highlightthickness=0)
-    dates_scrollbar = tk.Scrollbar(dates_list_frame, orient="vertical", 
-                                 command=dates_canvas.yview)
-    dates_scrollable = tk.Frame(dates_canvas, bg=colors['card_bg'])
-    
-    dates_scrollable.bind(
-        "<Configure>",
-        lambda e: dates_canvas.configure(scrollregion=dates_canvas.bbox("all"))
-    )
-    
-    dates_canvas.create_window((0, 0), window=dates_scrollable, anchor="nw")
-    dates_canvas.configure(yscrollcommand=dates_scrollbar.set)
-    
-    dates_canvas.pack(side="left", fill="both", expand=True)
-    dates_scrollbar.pack(side="right", fill="y")
-    
-    # Store date button references
-    date_buttons = []
-    
-    # Create date buttons
-    for i, date_str in enumerate(sorted_dates):
-        date_btn_frame = tk.Frame(dates_scrollable, bg=colors['card_bg'])
-        date_btn_frame.pack(fill='x', pady=2)
-        
-        # Format date display
-        try:
-            date_obj = datetime.datetime.strptime(date_str, "%Y-%m-%d")
-            display_date = date_obj.strftime("%b %d, %Y")
-            weekday = date_obj.strftime("%A")
-        except:
-            display_date = date_str
-            weekday = ""
-        
-        # Get data for this date
-        data = health_data[date_str]
-        sleep_val = data.get('sleep', '--')
-        water_val = data.get('water', '--')
-        mood_val = data.get('mood', '--')
-        
-        # Determine icon
-        if sleep_val != '--' and water_val != '--' and mood_val != '--':
-            icon = "✅"
-        else:
-            icon = "📝"
-        
-        # Create date button
-        date_btn = tk.Button(date_btn_frame, 
-                            text=f"{icon} {display_date}",
-                            bg=colors['light_card'], fg='white',
-                            font=("Arial", 11),
-                            padx=15, pady=10,
-                            anchor='w',
-                            relief='flat',
-                            cursor="hand2")
-        date_btn.pack(fill='x')
-        
-        # Add weekday label
-        if weekday:
-            weekday_label = tk.Label(date_btn_frame, 
-                                    text=weekday,
-                                    font=("Arial", 9),
-                                    bg=colors['light_card'], 
-                                    fg='#8b9bb4',
-                                    padx=15)
-            weekday_label.pack(fill='x', pady=(0, 5))
-        
-        # Store date and button reference
-        date_info = {
-            'date': date_str,
-            'button': date_btn,
-            'frame': date_btn_frame,
-            'selected': False
-        }
-        date_buttons.append(date_info)
-        
-        # Bind click event - use closure to avoid lambda variable issues
-        def make_callback(date_str=date_str, btn_info=date_info):
-            return lambda: show_date_details(date_str, btn_info)
-        
-        date_btn.config(command=make_callback())
+    # Only the visible rows have widgets, so long histories stay fast
+    date_list = VirtualDateList(dates_card, colors, sorted_dates, health_data,
+                                on_select=lambda index: show_date_details(sorted_dates[index]))
+    date_list.frame.pack(fill='both', expand=True)
     
     # Right side: Details card
     details_card = tk.Frame(right_frame, bg=colors['card_bg'],
@@ -274,29 +346,10 @@ def view_health_history(app):
     app.history_details_text.pack(fill='both', expand=True)
     app.history_details_text.config(state='disabled')
     
-    def show_date_details(date_str, btn_info=None):
+    def show_date_details(date_str):
         """Display detailed information for selected date"""
         print(f"DEBUG [History]: Showing details for {date_str}")
         
-        # Update all button states
-        for date_info in date_buttons:
-            if date_info['date'] == date_str:
-                # Selected date
-                date_info['button'].config(bg='#3a86ff', font=("Arial", 11, "bold"))
-                date_info['selected'] = True
-                # Update weekday label
-                for widget in date_info['frame'].winfo_children():
-                    if isinstance(widget, tk.Label):
-                        widget.config(bg='#3a86ff')
-            else:
-                # Unselected date
-                date_info['button'].config(bg=colors['light_card'], font=("Arial", 11))
-                date_info['selected'] = False
-                # Update weekday label
-                for widget in date_info['frame'].winfo_children():
-                    if isinstance(widget, tk.Label):
-                        widget.config(bg=colors['light_card'])
-        
         # Get data for this date - directly from health_data
         data = health_data.get(date_str, {})
         print(f"DEBUG [History]: Data for {date_str}: {data}")
@@ -400,13 +453,7 @@ def view_health_history(app):
     
     # Default show first record
     if sorted_dates:
-        show_date_details(sorted_dates[0])
-    
-    # Bind mousewheel events
-    def on_mousewheel(event):
-        dates_canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
-    
-    dates_canvas.bind_all("<MouseWheel>", on_mousewheel)
+        date_list.select(0)
     
     # Add extra debug button for testing
     debug_frame = tk.Frame(main_frame, bg=colors['dark_bg'])
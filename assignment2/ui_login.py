@@ -1,6 +1,5 @@
 import tkinter as tk
-from tkinter import messagebox
-from auth import auth_system
+from tkinter import messagebox, ttk
 
 def create_login_screen(app):
     app.clear_frame()
@@ -82,7 +81,9 @@ def create_login_screen(app):
                              font=("Arial", 16),
                              bg=colors['light_card'], fg='white',
                              show="*", width=30)
-    password_entry.pack(pady=(0, 30), ipady=10)
+    password_entry.pack(pady=(0, 10), ipady=10)
+    
+    create_remember_checkbox(app, login_card)
     
     # Button frame
     button_frame = tk.Frame(login_card, bg=colors['card_bg'])
@@ -224,6 +225,17 @@ def show_register_form(app, login_card):
     # ESC exit
     app.root.bind('<Escape>', lambda e: app.exit_app())
 
+def create_remember_checkbox(app, login_card):
+    """'Keep me signed in' option under the password field"""
+    app.remember_me_var = tk.BooleanVar(value=False)
+    tk.Checkbutton(login_card, text="Keep me signed in",
+                   variable=app.remember_me_var,
+                   font=("Arial", 12),
+                   bg=app.colors['card_bg'], fg='white',
+                   selectcolor=app.colors['light_card'],
+                   activebackground=app.colors['card_bg'],
+                   activeforeground='white').pack(anchor='w', pady=(0, 20))
+
 def recreate_login_screen(app, login_card):
     """Recreate login form"""
     # Clear current card
@@ -255,7 +267,9 @@ def recreate_login_screen(app, login_card):
                              font=("Arial", 16),
                              bg=app.colors['light_card'], fg='white',
                              show="*", width=30)
-    password_entry.pack(pady=(0, 30), ipady=10)
+    password_entry.pack(pady=(0, 10), ipady=10)
+    
+    create_remember_checkbox(app, login_card)
     
     # Button frame
     button_frame = tk.Frame(login_card, bg=app.colors['card_bg'])
@@ -288,6 +302,31 @@ def recreate_login_screen(app, login_card):
                             command=lambda: show_register_form(app, login_card))
     register_btn.pack()
 
+def show_progress(app, text):
+    """Small modal window with a busy indicator; destroy() it when done"""
+    dialog = tk.Toplevel(app.root)
+    dialog.title("Please wait")
+    dialog.configure(bg=app.colors['card_bg'])
+    dialog.resizable(False, False)
+    dialog.transient(app.root)
+    dialog.protocol("WM_DELETE_WINDOW", lambda: None)  # Can't be closed mid-check
+    
+    tk.Label(dialog, text=text,
+             font=("Arial", 14),
+             bg=app.colors['card_bg'], fg='white').pack(padx=40, pady=(25, 15))
+    
+    progress = ttk.Progressbar(dialog, mode='indeterminate', length=250)
+    progress.pack(padx=40, pady=(0, 25))
+    progress.start(10)
+    
+    # Center over the main window and block input to it
+    dialog.update_idletasks()
+    x = app.root.winfo_x() + (app.root.winfo_width() - dialog.winfo_width()) // 2
+    y = app.root.winfo_y() + (app.root.winfo_height() - dialog.winfo_height()) // 2
+    dialog.geometry(f"+{x}+{y}")
+    dialog.grab_set()
+    return dialog
+
 def perform_login(app):
     """Perform login operation"""
     username = app.login_username_var.get()
@@ -297,13 +336,22 @@ def perform_login(app):
         messagebox.showerror("❌ Error", "Please enter username and password!")
         return
     
-    success, message = app.auth.login(username, password)
-    
-    if success:
-        messagebox.showinfo("✅ Success", message)
-        app.show_main_menu()
-    else:
-        messagebox.showerror("❌ Login Failed", message)
+    # Password checks are deliberately slow, so run them off the Tk thread
+    progress = show_progress(app, "🔐 Verifying credentials...")
+    
+    def on_done(result, error):
+        progress.destroy()
+        if error is not None:
+            messagebox.showerror("❌ Login Failed", f"An error occurred: {error}")
+            return
+        success, message = result
+        if success:
+            messagebox.showinfo("✅ Success", message)
+            app.show_main_menu()
+        else:
+            messagebox.showerror("❌ Login Failed", message)
+    
+    app.tasks.submit(app.auth.login, username, password, app.remember_me_var.get(), on_done=on_done)
 
 def perform_register(app):
     """Perform registration operation"""
@@ -319,24 +367,47 @@ def perform_register(app):
         messagebox.showerror("❌ Error", "Passwords do not match!")
         return
     
-    success, message = app.auth.register(username, password)
-    
-    if success:
-        messagebox.showinfo("✅ Success", message)
-        # Auto login
-        app.auth.login(username, password)
-        app.show_main_menu()
-    else:
-        messagebox.showerror("❌ Registration Failed", message)
+    def register_and_login():
+        # Auto login, without checking the new password a second time
+        return app.auth.register(username, password, sign_in=True)
+    
+    progress = show_progress(app, "🔐 Creating your account...")
+    
+    def on_done(result, error):
+        progress.destroy()
+        if error is not None:
+            messagebox.showerror("❌ Registration Failed", f"An error occurred: {error}")
+            return
+        success, message = result
+        if success:
+            messagebox.showinfo("✅ Success", message)
+            app.show_main_menu()
+        else:
+            messagebox.showerror("❌ Registration Failed", message)
+    
+    app.tasks.submit(register_and_login, on_done=on_done)
 
 def guest_login(app):
     """Guest mode login"""
     # Create temporary guest account
     import random
     guest_username = f"guest_{random.randint(1000, 9999)}"
-    success, _ = app.auth.register(guest_username, "guest123", "Guest User")
     
-    if success:
-        app.auth.login(guest_username, "guest123")
-        messagebox.showinfo("👤 Guest Mode", f"Logged in as {guest_username}\n\nNote: Guest data will not be saved permanently.")
-        app.show_main_menu()
\ No newline at end of file
+    def register_and_login():
+        return app.auth.register(guest_username, "guest123", "Guest User", sign_in=True)
+    
+    progress = show_progress(app, "👤 Preparing guest session...")
+    
+    def on_done(result, error):
+        progress.destroy()
+        if error is not None:
+            messagebox.showerror("❌ Guest Mode Failed", f"An error occurred: {error}")
+            return
+        success, message = result
+        if success:
+            messagebox.showinfo("👤 Guest Mode", f"Logged in as {guest_username}\n\nNote: Guest data will not be saved permanently.")
+            app.show_main_menu()
+        else:
+            messagebox.showerror("❌ Guest Mode Failed", message)
+    
+    app.tasks.submit(register_and_login, on_done=on_done)
\ No newline at end of file
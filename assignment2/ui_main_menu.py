@@ -523,7 +523,7 @@ def create_edit_profile_form(app, parent, window):
                 "name": profile_name.get().strip()
             }
             
-            # Save using auth system
+            # Save using auth system; the PersistenceWorker writes it to disk
             success = app.save_profile(profile_data)
             
             if success:
@@ -631,11 +631,31 @@ def show_reports(app):
     recommendations_tab = tk.Frame(notebook, bg=app.colors['dark_bg'])
     notebook.add(recommendations_tab, text="💡 Recommendations")
     
-    # Fill overview tab
-    fill_overview_tab(app, overview_tab)
+    # Statistics and score history are computed on the task executor
+    loading_labels = []
+    for tab in (overview_tab, recommendations_tab):
+        label = tk.Label(tab, text="⏳ Building report...",
+                         font=("Arial", 14),
+                         bg=app.colors['dark_bg'], fg='white')
+        label.pack(pady=50)
+        loading_labels.append(label)
+    
+    def on_done(report, error):
+        for label in loading_labels:
+            label.destroy()
+        if error is not None:
+            messagebox.showerror("❌ Error", f"Could not build the report:\n{error}", parent=report_window)
+            return
+        
+        # Fill overview tab
+        fill_overview_tab(app, overview_tab, report)
+        
+        # Fill recommendations tab
+        fill_recommendations_tab(app, recommendations_tab, report)
     
-    # Fill recommendations tab
-    fill_recommendations_tab(app, recommendations_tab)
+    task = app.tasks.submit(build_report, app, on_done=on_done)
+    # Closing the window early drops the result
+    report_window.bind("<Destroy>", lambda e: task.cancel() if e.widget is report_window else None)
     
     # Close button
     close_frame = tk.Frame(report_window, bg=app.colors['dark_bg'])
@@ -648,9 +668,21 @@ def show_reports(app):
                          command=report_window.destroy)
     close_btn.pack()
 
-def fill_overview_tab(app, parent):
+def build_report(app):
+    """Statistics for the report tabs; runs on the task executor"""
+    # analytics loads numpy, so it is imported on this worker thread
+    from analytics import NUMPY_AVAILABLE
+    report = {"stats": app.stats.summary(), "highlights": None}
+    # Score history needs numpy for the batch scores
+    if NUMPY_AVAILABLE and report["stats"]["total_days"]:
+        report["highlights"] = app.stats.score_highlights()
+    return report
+
+def fill_overview_tab(app, parent, report):
     """Fill overview tab"""
-    health_data = app.health_data
+    stats = report['stats']
+    # Only the most recent week of logs is needed here
+    health_data = stats['recent']
     
     if not health_data:
         tk.Label(parent, text="No health data available yet.",
@@ -670,22 +702,15 @@ def fill_overview_tab(app, parent):
     canvas.pack(side="left", fill="both", expand=True)
     scrollbar.pack(side="right", fill="y")
     
-    # Calculate statistics
-    total_days = len(health_data)
-    recent_days = min(7, total_days)
+    # Statistics are shared with the other screens (see health_stats.HealthStats)
+    total_days = stats['total_days']
+    recent_days = stats['recent_days']
+    avg_sleep, avg_water, avg_mood = stats['avg_sleep'], stats['avg_water'], stats['avg_mood']
     
     # Get last 7 days data
-    sorted_dates = sorted(health_data.keys(), reverse=True)
+    sorted_dates = list(health_data)
     recent_data = [health_data[date] for date in sorted_dates[:recent_days]]
     
-    # Calculate averages
-    if recent_data:
-        avg_sleep = sum(d.get('sleep', 0) for d in recent_data) / len(recent_data)
-        avg_water = sum(d.get('water', 0) for d in recent_data) / len(recent_data)
-        avg_mood = sum(d.get('mood', 0) for d in recent_data) / len(recent_data)
-    else:
-        avg_sleep = avg_water = avg_mood = 0
-    
     # Create cards container
     cards_frame = tk.Frame(scrollable, bg=app.colors['dark_bg'])
     cards_frame.pack(fill='both', expand=True, padx=20, pady=20)
@@ -712,7 +737,7 @@ def fill_overview_tab(app, parent):
              justify='left').pack(anchor='w')
     
     # Statistics card 2: Health score
-    health_score = calculate_health_score(avg_sleep, avg_water, avg_mood)
+    health_score = stats['health_score']
     
     stats_card2 = tk.Frame(cards_frame, bg=app.colors['card_bg'],
                           padx=20, pady=20, relief='raised', borderwidth=2)
@@ -740,6 +765,30 @@ def fill_overview_tab(app, parent):
              font=("Arial", 12),
              bg=app.colors['card_bg'], fg='white').pack(pady=10)
     
+    # Statistics card 3: Score history (needs numpy for the batch scores)
+    highlights = report['highlights']
+    if highlights is not None:
+        stats_card3 = tk.Frame(cards_frame, bg=app.colors['card_bg'],
+                              padx=20, pady=20, relief='raised', borderwidth=2)
+        stats_card3.pack(fill='x', pady=(0, 15))
+        
+        tk.Label(stats_card3, text="🏆 Score History",
+                 font=("Arial", 18, "bold"),
+                 bg=app.colors['card_bg'], fg='#FFD700').pack(anchor='w', pady=(0, 15))
+        
+        best, worst, streaks = highlights['best_week'], highlights['worst_week'], highlights['streaks']
+        history_text = f"""• Best Week: {best['start']} to {best['end']} ({best['score']:.0f}/100)
+• Worst Week: {worst['start']} to {worst['end']} ({worst['score']:.0f}/100)
+• Longest Streak (score 70+): {streaks['longest']} days
+• Current Streak: {streaks['current']} days
+• Score Trend: {highlights['trend']:+.1f} points/week
+"""
+        
+        tk.Label(stats_card3, text=history_text,
+                 font=("Arial", 12),
+                 bg=app.colors['card_bg'], fg='white',
+                 justify='left').pack(anchor='w')
+    
     # Recent records
     if recent_data:
         recent_card = tk.Frame(cards_frame, bg=app.colors['card_bg'],
@@ -769,9 +818,10 @@ def fill_overview_tab(app, parent):
                      font=("Arial", 11),
                      bg=app.colors['light_card'], fg='white').pack(anchor='w')
 
-def fill_recommendations_tab(app, parent):
+def fill_recommendations_tab(app, parent, report):
     """Fill recommendations tab"""
-    health_data = app.health_data
+    stats = report['stats']
+    health_data = stats['recent']
     
     if not health_data:
         tk.Label(parent, text="Log more data to get personalized recommendations.",
@@ -780,7 +830,7 @@ def fill_recommendations_tab(app, parent):
         return
     
     # Calculate recent data
-    sorted_dates = sorted(health_data.keys(), reverse=True)
+    sorted_dates = list(health_data)
     recent_data = [health_data[date] for date in sorted_dates[:7] if date in health_data]
     
     if not recent_data:
@@ -802,9 +852,7 @@ def fill_recommendations_tab(app, parent):
     scrollbar.pack(side="right", fill="y")
     
     # Analyze data
-    avg_sleep = sum(d.get('sleep', 0) for d in recent_data) / len(recent_data)
-    avg_water = sum(d.get('water', 0) for d in recent_data) / len(recent_data)
-    avg_mood = sum(d.get('mood', 0) for d in recent_data) / len(recent_data)
+    avg_sleep, avg_water, avg_mood = stats['avg_sleep'], stats['avg_water'], stats['avg_mood']
     
     # Create recommendations cards
     cards_frame = tk.Frame(scrollable, bg=app.colors['dark_bg'])
@@ -912,28 +960,4 @@ def fill_recommendations_tab(app, parent):
     tk.Label(mood_card, text=mood_advice,
              font=("Arial", 12),
              bg=app.colors['card_bg'], fg='white',
-             justify='left', wraplength=600).pack(anchor='w')
-
-def calculate_health_score(sleep, water, mood):
-    """Calculate health score (0-100)"""
-    # Sleep score (0-40 points)
-    sleep_score = 0
-    if sleep >= 7 and sleep <= 9:
-        sleep_score = 40  # Ideal range
-    elif sleep >= 6 and sleep <= 10:
-        sleep_score = 30  # Acceptable range
-    elif sleep >= 5 and sleep <= 11:
-        sleep_score = 20  # Marginal range
-    else:
-        sleep_score = 10  # Unhealthy
-    
-    # Water score (0-30 points)
-    water_score = min(water / 10 * 30, 30)  # 10 cups gets 30 points
-    
-    # Mood score (0-30 points)
-    mood_score = (mood / 5) * 30  # 5 points gets 30 points
-    
-    total_score = sleep_score + water_score + mood_score
-    
-    # Ensure between 0-100
-    return min(max(total_score, 0), 100)
\ No newline at end of file
+             justify='left', wraplength=600).pack(anchor='w')
\ No newline at end of file
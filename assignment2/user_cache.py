@@ -0,0 +1,102 @@
+import json
+from collections import OrderedDict
+
+# Default budget for hydrated user records
+DEFAULT_MAX_ENTRIES = 20
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+
+
+def estimate_size(obj):
+    """Approximate memory cost of a record by its compact JSON size"""
+    return len(json.dumps(obj, separators=(",", ":")))
+
+
+class UserCache:
+    """Least-recently-used store of hydrated user records
+
+    Holds at most max_entries users and about max_bytes of data (either
+    limit may be None). evict() drops the least recently used users that
+    the caller allows, e.g. everyone except the logged-in user and users
+    with unsaved changes.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._records = OrderedDict()
+        self._sizes = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, username):
+        return username in self._records
+
+    def __getitem__(self, username):
+        return self._records[username]
+
+    def __setitem__(self, username, user):
+        self.put(username, user)
+
+    def __delitem__(self, username):
+        del self._records[username]
+        self.total_bytes -= self._sizes.pop(username)
+
+    def __iter__(self):
+        return iter(list(self._records))
+
+    def __len__(self):
+        return len(self._records)
+
+    def keys(self):
+        return list(self._records)
+
+    def get(self, username, default=None):
+        """Look a user up, counting the hit or miss and marking it recently used"""
+        user = self._records.get(username)
+        if user is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self._records.move_to_end(username)
+        return user
+
+    def put(self, username, user, size=None):
+        if username in self._records:
+            del self[username]
+        size = estimate_size(user) if size is None else size
+        self._records[username] = user
+        self._sizes[username] = size
+        self.total_bytes += size
+
+    def add_size(self, username, delta):
+        """Account for data added to a cached record"""
+        if username in self._sizes:
+            self._sizes[username] += delta
+            self.total_bytes += delta
+
+    def over_budget(self):
+        return ((self.max_entries is not None and len(self._records) > self.max_entries) or
+                (self.max_bytes is not None and self.total_bytes > self.max_bytes))
+
+    def evict(self, can_evict=lambda username: True):
+        """Drop least recently used records until within budget; returns their names"""
+        evicted = []
+        for username in list(self._records):
+            if not self.over_budget():
+                break
+            if can_evict(username):
+                del self[username]
+                self.evictions += 1
+                evicted.append(username)
+        return evicted
+
+    def stats(self):
+        return {
+            "entries": len(self._records),
+            "bytes": self.total_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
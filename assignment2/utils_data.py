@@ -1,24 +1,12 @@
-import json
-import os
+from storage import read_json, write_json_atomic
 
 def load_data():
-    health_data = {}
-    profile = {}
-
-    if os.path.exists("health_data.json"):
-        with open("health_data.json", "r") as f:
-            health_data = json.load(f)
-
-    if os.path.exists("user_profile.json"):
-        with open("user_profile.json", "r") as f:
-            profile = json.load(f)
+    health_data = read_json("health_data.json", {})
+    profile = read_json("user_profile.json", {})
 
     return health_data, profile
 
 
 def save_data(health_data, profile):
-    with open("health_data.json", "w") as f:
-        json.dump(health_data, f, indent=4)
-
-    with open("user_profile.json", "w") as f:
-        json.dump(profile, f, indent=4)
\ No newline at end of file
+    write_json_atomic("health_data.json", health_data)
+    write_json_atomic("user_profile.json", profile)